@@ -0,0 +1,335 @@
+"""Rate limiting, retries, circuit breaking and coalescing for Google API calls.
+
+Every googleapiclient request goes through the process-wide GoogleApi for
+its API instead of a bare .execute():
+
+    gmail = google_api.api("gmail")
+    gmail.execute(service.users().messages().send(userId="me", body=body), "messages.send")
+"""
+import copy
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Quota units each Gmail method costs; anything not listed costs 1
+QUOTA_UNITS = {
+    "messages.send": 100,
+    "messages.get": 5,
+    "messages.list": 5,
+    "messages.modify": 5,
+    "history.list": 2,
+    "getProfile": 1,
+}
+
+# Per-user quota in units per second: Gmail gives 250, Calendar about 600 queries
+# a minute. Override with GMAIL_QUOTA_PER_SECOND / CALENDAR_QUOTA_PER_SECOND.
+DEFAULT_QUOTAS = {"gmail": 250, "calendar": 10}
+
+MAX_ATTEMPTS = int(os.getenv("GOOGLE_API_MAX_ATTEMPTS", "5"))
+BASE_DELAY = float(os.getenv("GOOGLE_API_BASE_DELAY", "0.5"))
+MAX_DELAY = float(os.getenv("GOOGLE_API_MAX_DELAY", "32"))
+BREAKER_THRESHOLD = int(os.getenv("GOOGLE_API_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("GOOGLE_API_BREAKER_RESET_SECONDS", "30"))
+
+# Statuses worth another try; 403 only when it's a rate limit
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+# Methods that may already have gone through when they fail with a 5xx or a
+# dropped connection, so another try could send the same email twice
+NOT_IDEMPOTENT = {"messages.send"}
+
+
+class CircuitOpenError(Exception):
+    """The API kept failing, so calls fail fast until the breaker lets one through again."""
+
+
+def is_throttled(error: Exception) -> bool:
+    """Google telling us to slow down, as opposed to being broken."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    return status == 429 or (status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS))
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, HttpError):
+        return is_throttled(error) or error.resp.status in RETRYABLE_STATUSES
+    # Dropped connections and timeouts from httplib2
+    return isinstance(error, OSError)
+
+
+def can_retry(error: Exception, method: str = "call") -> bool:
+    """Whether another try of method is worth it and safe.
+
+    A throttled call was never processed, so it can always be retried;
+    other transient errors only for methods that are safe to repeat.
+    """
+    if method in NOT_IDEMPOTENT:
+        return is_throttled(error)
+    return is_retryable(error)
+
+
+def retry_after(error: Exception):
+    """Seconds the response's Retry-After header asks us to wait, if it has one."""
+    resp = getattr(error, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate halves when Google throttles and creeps back afterwards.
+
+    Starts at the quota ceiling; a throttled call halves the rate (at most
+    once a second, since every call in flight sees the same 429, and never
+    below 1/16 of the ceiling) and each success adds back a small share of
+    it, so after a burst of 429s the sender settles just under what Google
+    accepts instead of hammering it or stalling.
+    """
+
+    def __init__(self, rate: float, burst: float = None, min_fraction: float = 1 / 16,
+                 increase_fraction: float = 0.02):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = rate * min_fraction
+        self.increase = rate * increase_fraction
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.decreased = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, cost: float = 1):
+        cost = min(cost, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = (cost - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        with self.lock:
+            # Whatever burst was saved up is what got us throttled
+            self.tokens = min(self.tokens, 0)
+            now = time.monotonic()
+            if now - self.decreased >= 1:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.decreased = now
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class CircuitBreaker:
+    """Stops calling an API after `failure_threshold` server errors in a row.
+
+    While open, calls fail fast with CircuitOpenError. After reset_timeout
+    one trial call is let through; it closes the circuit if it works and
+    re-opens it if it doesn't. Throttling and client errors don't count:
+    the API answered, it just said no.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+
+    def before_call(self):
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} API circuit is open after {self.failures} failures")
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.trial_running:
+                    raise CircuitOpenError(f"{self.name} API circuit is half open, waiting on a trial call")
+                self.trial_running = True
+
+    def succeeded(self):
+        with self.lock:
+            if self.state != "closed":
+                logger.info("%s API circuit closed", self.name)
+            self.state = "closed"
+            self.failures = 0
+            self.trial_running = False
+
+    def failed(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                metrics.incr("google_api_circuit_open_total", api=self.name)
+                logger.warning("%s API circuit opened after %d failures", self.name, self.failures)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GoogleApi:
+    """Shared call path for one Google API.
+
+    execute() waits for a token from the calling user's bucket (priced in
+    quota units), retries throttling, 5xx and connection errors (only
+    throttling for sends, see NOT_IDEMPOTENT) with full-jitter
+    exponential backoff that honours Retry-After, and goes
+    through the API's circuit breaker. Identical GETs already in flight are
+    coalesced: later callers wait for the first one's response and get
+    their own copy of it.
+    """
+
+    def __init__(self, name: str, rate: float, max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, breaker: CircuitBreaker = None):
+        self.name = name
+        self.rate = rate
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker(name)
+        self.lock = threading.Lock()
+        self.limiters = {}
+        self.in_flight = {}
+
+    def set_rate(self, user: str, rate: float):
+        """Give one user (mailbox) its own quota instead of the API-wide default."""
+        with self.lock:
+            self.limiters[user] = AdaptiveRateLimiter(rate)
+
+    def limiter(self, user: str = "me") -> AdaptiveRateLimiter:
+        with self.lock:
+            limiter = self.limiters.get(user)
+            if limiter is None:
+                limiter = self.limiters[user] = AdaptiveRateLimiter(self.rate)
+            return limiter
+
+    def execute(self, request, method: str = "call", user: str = "me", cost: float = None,
+                coalesce: bool = None, max_attempts: int = None):
+        """request.execute() with rate limiting, retries and the circuit breaker.
+
+        cost defaults to QUOTA_UNITS[method]. GETs are coalesced unless
+        coalesce=False; coalesce=True also coalesces other read-only calls
+        (like a freebusy query) on their method, URI and body.
+        """
+        key = _coalesce_key(request, user, coalesce)
+        if key is None:
+            return self._execute(request, method, user, cost, max_attempts)
+
+        with self.lock:
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = _InFlight()
+        if not leader:
+            metrics.incr("google_api_coalesced_total", api=self.name, method=method)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = self._execute(request, method, user, cost, max_attempts)
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+
+    def _execute(self, request, method, user, cost, max_attempts):
+        limiter = self.limiter(user)
+        cost = QUOTA_UNITS.get(method, 1) if cost is None else cost
+        attempts = max_attempts or self.max_attempts
+        for attempt in range(attempts):
+            self.breaker.before_call()
+            with metrics.timer("google_api_rate_limit_wait_seconds", api=self.name):
+                limiter.acquire(cost)
+            try:
+                result = request.execute()
+            except Exception as error:
+                self.note_error(error, user)
+                if not can_retry(error, method) or attempt == attempts - 1:
+                    raise
+                metrics.incr("google_api_retries_total", api=self.name, method=method,
+                             status=getattr(getattr(error, "resp", None), "status", "network"))
+                self.wait_before_retry(attempt, error)
+                continue
+            limiter.succeeded()
+            self.breaker.succeeded()
+            return result
+
+    def note_error(self, error: Exception, user: str = "me"):
+        """Slow the user's bucket on throttling; count server and connection errors towards the breaker."""
+        if is_throttled(error):
+            self.limiter(user).throttled()
+            self.breaker.succeeded()
+        elif is_retryable(error):
+            self.breaker.failed()
+        else:
+            self.breaker.succeeded()
+
+    def wait_before_retry(self, attempt: int, error: Exception):
+        """Sleep the full-jitter backoff for this attempt, or Retry-After if that's longer."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        delay = max(delay, retry_after(error) or 0)
+        logger.debug("%s API call failed (%s), retrying in %.2fs", self.name, error, delay)
+        time.sleep(delay)
+
+
+def _coalesce_key(request, user, coalesce):
+    method = getattr(request, "method", None)
+    uri = getattr(request, "uri", None)
+    if coalesce is False or method is None or uri is None:
+        return None
+    if method == "GET":
+        return user, method, uri
+    if coalesce:
+        return user, method, uri, getattr(request, "body", None)
+    return None
+
+
+_apis = {}
+_apis_lock = threading.Lock()
+
+
+def api(name: str) -> GoogleApi:
+    """The process-wide GoogleApi for name ("gmail", "calendar"), created on first use."""
+    with _apis_lock:
+        if name not in _apis:
+            rate = float(os.getenv(f"{name.upper()}_QUOTA_PER_SECOND", DEFAULT_QUOTAS.get(name, 10)))
+            _apis[name] = GoogleApi(name, rate)
+        return _apis[name]
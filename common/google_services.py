@@ -0,0 +1,115 @@
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceManager:
+    """Process-wide OAuth credentials and a small pool of API clients.
+
+    token.json is read once, the access token is refreshed on a background
+    timer a few minutes before it expires (and written back atomically), and
+    built clients are reused instead of re-parsing the discovery document on
+    every call. googleapiclient clients are not thread safe, so each caller
+    checks one out of the pool and hands it back when done.
+    """
+
+    def __init__(self, api: str, version: str, scopes, token_file: str = "token.json",
+                 client_secrets_file: str = "credentials.json", pool_size: int = 4,
+                 refresh_margin: float = 300):
+        self.api = api
+        self.version = version
+        self.scopes = scopes
+        self.token_file = token_file
+        self.client_secrets_file = client_secrets_file
+        self.refresh_margin = refresh_margin
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+        self.creds = None
+        self.timer = None
+
+    @property
+    def credentials(self):
+        with self.lock:
+            if self.creds is None or not self.creds.valid:
+                self._load()
+            return self.creds
+
+    def _load(self):
+        creds = self.creds
+        if creds is None and os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.client_secrets_file, self.scopes)
+                creds = flow.run_local_server(port=0)
+            self._save(creds)
+
+        self.creds = creds
+        self._schedule_refresh()
+
+    def _save(self, creds):
+        # Write to a temp file first so a crash never leaves a truncated token
+        tmp_path = f"{self.token_file}.tmp"
+        with open(tmp_path, "w") as token:
+            token.write(creds.to_json())
+        os.replace(tmp_path, self.token_file)
+
+    def _schedule_refresh(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.creds.expiry or not self.creds.refresh_token:
+            return
+        delay = (self.creds.expiry - datetime.utcnow()).total_seconds() - self.refresh_margin
+        self.timer = threading.Timer(max(delay, 30), self._refresh)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _refresh(self):
+        with self.lock:
+            try:
+                self.creds.refresh(Request())
+                self._save(self.creds)
+            except Exception as error:
+                # Leave the old token in place; the next caller retries inline
+                logger.warning("Background token refresh failed: %s", error)
+            self._schedule_refresh()
+
+    def acquire(self):
+        """Take a client out of the pool, building one if the pool is empty."""
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            return build(self.api, self.version, credentials=self.credentials)
+
+    def release(self, service):
+        """Give a client back; extras beyond pool_size are dropped."""
+        try:
+            self.pool.put_nowait(service)
+        except queue.Full:
+            pass
+
+    @contextmanager
+    def service(self):
+        service = self.acquire()
+        try:
+            yield service
+        finally:
+            self.release(service)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
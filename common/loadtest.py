@@ -0,0 +1,136 @@
+"""Latency recording and reporting shared by the bench_load.py scripts.
+
+Each entry point's calls are timed into a Recorder; report() prints
+throughput and p50/p99 per entry point, and check_baseline() compares them
+with a saved run so a regression fails the script with exit code 1.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of a list of numbers, q between 0 and 100."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Per-entry-point latencies, errors and the wall time spent driving each one."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.wall = {}
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    @contextmanager
+    def time(self, name: str):
+        """Time one call; an exception counts as an error and is re-raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, time.perf_counter() - started, error=True)
+            raise
+        self.record(name, time.perf_counter() - started)
+
+    def timed(self, name: str, fn):
+        """Wrap fn so every call is recorded under name."""
+        def wrapper(*args, **kwargs):
+            with self.time(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    @contextmanager
+    def phase(self, *names):
+        """Count the block's wall time towards the throughput of each named entry point."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                for name in names:
+                    self.wall[name] = self.wall.get(name, 0.0) + elapsed
+
+    def results(self):
+        """{name: {calls, errors, throughput, p50_ms, p99_ms, max_ms}} for every entry point seen."""
+        with self.lock:
+            samples = {name: list(s) for name, s in self.samples.items()}
+            errors = dict(self.errors)
+            wall = dict(self.wall)
+        results = {}
+        for name, latencies in samples.items():
+            elapsed = wall.get(name) or sum(latencies)
+            results[name] = {
+                "calls": len(latencies),
+                "errors": errors.get(name, 0),
+                "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(max(latencies) * 1000, 2),
+            }
+        return results
+
+
+def report(results):
+    print(f"{'entry point':<32} {'calls':>7} {'errors':>7} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, r in results.items():
+        print(f"{name:<32} {r['calls']:7d} {r['errors']:7d} {r['throughput']:9.2f} "
+              f"{r['p50_ms']:9.1f} {r['p99_ms']:9.1f} {r['max_ms']:9.1f}")
+
+
+def save(results, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def check_baseline(results, path: str, tolerance: float = 0.2):
+    """Entry points whose p99 grew, or throughput dropped, by more than tolerance vs the saved run."""
+    with open(path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, before in baseline.items():
+        now = results.get(name)
+        if now is None:
+            continue
+        if before["p99_ms"] and now["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before['p99_ms']:.1f}ms -> {now['p99_ms']:.1f}ms")
+        if before["throughput"] and now["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput']:.1f}/s -> {now['throughput']:.1f}/s")
+    return regressions
+
+
+def add_arguments(parser):
+    """The --save/--baseline/--tolerance options every bench_load.py takes."""
+    parser.add_argument("--save", help="write the results as JSON, to use as a baseline later")
+    parser.add_argument("--baseline", help="compare with a saved run and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p99/throughput change (0.2 = 20%%)")
+
+
+def finish(args, recorder: Recorder) -> int:
+    """Print the report, save and compare as asked; returns the exit code."""
+    results = recorder.results()
+    report(results)
+    if args.save:
+        save(results, args.save)
+    if args.baseline:
+        regressions = check_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
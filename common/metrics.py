@@ -0,0 +1,191 @@
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets in seconds, from a cache hit up to a slow LLM call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Share of payload-sized debug logs (prompts, responses) that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+
+class Metrics:
+    """Counters, gauges and latency histograms kept in memory, cheap enough for hot paths.
+
+    Names follow Prometheus conventions; labels are keyword arguments.
+    Everything is served by serve() as Prometheus text on /metrics and as
+    JSON on /metrics.json.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        # (name, labels) -> [bucket counts..., count, sum]
+        self.histograms = {}
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        """Set a value that can go up and down, like a backlog size."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+            if i < len(BUCKETS):
+                hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the block into histogram `name`; failures also count in `<name>_errors_total`."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incr(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        """Everything recorded so far, as plain JSON-able dicts."""
+        with self.lock:
+            counters = list(self.counters.items())
+            gauges = list(self.gauges.items())
+            histograms = [(key, list(hist)) for key, hist in self.histograms.items()]
+        return {
+            "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in counters],
+            "gauges": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in gauges],
+            "timers": [
+                {"name": n, "labels": dict(l), "count": h[-2], "sum": round(h[-1], 6),
+                 "buckets": dict(zip(map(str, BUCKETS), h[:len(BUCKETS)]))}
+                for (n, l), h in histograms
+            ],
+        }
+
+    def render_prometheus(self) -> str:
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((key, list(hist)) for key, hist in self.histograms.items())
+        lines = []
+        typed = set()
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in values:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+# One registry per process, shared by every module
+metrics = Metrics()
+incr = metrics.incr
+gauge = metrics.gauge
+observe = metrics.observe
+timer = metrics.timer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Set by serve(): returns (healthy, report) for /health
+    health = None
+
+    def do_GET(self):
+        status = 200
+        if self.path == "/metrics":
+            body = metrics.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = json.dumps(metrics.snapshot()).encode()
+            content_type = "application/json"
+        elif self.path == "/health" and self.health is not None:
+            healthy, report = self.health()
+            body = json.dumps(report).encode()
+            content_type = "application/json"
+            status = 200 if healthy else 503
+        else:
+            self.send_error(404)
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown out the real logs
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1", health=None):
+    """Serve /metrics and /metrics.json from a daemon thread; returns the server.
+
+    With health, a callable returning (healthy, report), /health answers
+    with the report as JSON, and status 503 while not healthy.
+    """
+    handler = type("Handler", (_Handler,), {"health": staticmethod(health)}) if health else _Handler
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def count_tokens(response):
+    """Add a Gemini response's usage metadata to the llm_tokens_total counters."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind in ("prompt_token_count", "candidates_token_count", "cached_content_token_count"):
+        count = getattr(usage, kind, None)
+        if count:
+            incr("llm_tokens_total", count, kind=kind[:-len("_token_count")])
+
+
+def setup_logging():
+    """Log level from LOG_LEVEL (default INFO), one line per record with the time and module."""
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+
+def log_sampled(logger, msg, *args, rate: float = None):
+    """Debug-log a large payload for only a sample of calls, so stdout isn't the bottleneck."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < (LOG_SAMPLE_RATE if rate is None else rate):
+        logger.debug(msg, *args)
@@ -0,0 +1,116 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+# Words that say nothing about what is being asked
+STOP_WORDS = {
+    "a", "an", "and", "are", "be", "can", "do", "does", "for", "hi", "hello", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "the", "thanks",
+    "thank", "there", "this", "to", "what", "you", "your",
+}
+
+
+def normalize_question(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def _vector(normalized: str):
+    terms = [w for w in normalized.split() if w not in STOP_WORDS]
+    counts = Counter(terms)
+    counts.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+    weights = {t: 1 + math.log(c) for t, c in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {t: w / norm for t, w in weights.items()}
+
+
+class AnswerCache:
+    """Reuses Gemini answers for questions candidates have already asked.
+
+    Answers are keyed on (job ID, normalized question). With a
+    similarity_threshold set, a miss on the exact key falls back to the most
+    similar cached question for the same job (cosine similarity over word and
+    bigram counts), found through an inverted index so only entries sharing
+    a word are compared. Entries expire after ttl seconds and the least
+    recently used one is evicted once max_entries is reached.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 1000, similarity_threshold: float = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.lock = threading.Lock()
+        # (job_id, normalized question) -> (answer, vector, stored at)
+        self.entries = OrderedDict()
+        # (job_id, term) -> keys of entries containing that term
+        self.index = defaultdict(set)
+        self.stats = Counter()
+
+    def get(self, job_id, question):
+        normalized = normalize_question(question)
+        key = (job_id, normalized)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and now - entry[2] < self.ttl:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                metrics.incr("answer_cache_total", result="hits")
+                return entry[0]
+            if entry:
+                self._remove(key)
+
+            if self.similarity_threshold:
+                match = self._nearest(job_id, _vector(normalized), now)
+                if match:
+                    self.entries.move_to_end(match)
+                    self.stats["near_hits"] += 1
+                    metrics.incr("answer_cache_total", result="near_hits")
+                    return self.entries[match][0]
+
+            self.stats["misses"] += 1
+            metrics.incr("answer_cache_total", result="misses")
+            return None
+
+    def put(self, job_id, question, answer):
+        normalized = normalize_question(question)
+        key = (job_id, normalized)
+        vector = _vector(normalized)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (answer, vector, time.monotonic())
+            for term in vector:
+                self.index[(job_id, term)].add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+                metrics.incr("answer_cache_total", result="evictions")
+
+    def _nearest(self, job_id, vector, now):
+        candidates = set()
+        for term in vector:
+            candidates |= self.index.get((job_id, term), set())
+
+        best, best_score = None, self.similarity_threshold
+        for key in candidates:
+            answer, other, stored = self.entries[key]
+            if now - stored >= self.ttl:
+                continue
+            score = sum(w * other.get(t, 0.0) for t, w in vector.items())
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def _remove(self, key):
+        _, vector, _ = self.entries.pop(key)
+        for term in vector:
+            keys = self.index.get((key[0], term))
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.index[(key[0], term)]
@@ -1,119 +1,72 @@
 import os.path
 import base64
+import functools
 from email.mime.text import MIMEText
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import logging
+
 from googleapiclient.errors import HttpError
 from flask import jsonify, request
 from time import sleep
+import time
+from datetime import timedelta
 import google.generativeai as genai
 
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+from answer_cache import AnswerCache
+from gmail_sync import HistorySync, IdleBackoff
+from google_services import ServiceManager
+from job_registry import JobRegistry, RECRUITER_INSTRUCTIONS
+from ledger import LEDGER_FILE, SqliteLedger
+from pipeline import ReplyPipeline
+from prompt_cache import PromptCache
+
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("email-server")
+
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-pro")
 
-# Scope for read/write access
-SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
+# The job context is uploaded once and reused until the TTL runs out or the text changes
+prompt_cache = PromptCache("gemini-2.5-pro", ttl=timedelta(minutes=int(os.getenv("PROMPT_CACHE_TTL_MINUTES", "60"))))
 
+# Answers to questions we've already seen. ANSWER_CACHE_SIMILARITY turns on
+# near-duplicate matching (cosine similarity, 0-1); leave unset for exact only.
+answer_cache = AnswerCache(
+    ttl=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600))),
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+    similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0")) or None,
+)
 
-def create_message(to, subject, message_text):
-    """Create a message for an email reply."""
-    message = MIMEText(message_text)
-    message["to"] = to
-    message["subject"] = subject
-    raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
-    return {"raw": raw}
+# Job postings, loaded on first use from Supabase or the local jobs.json snapshot
+job_registry = JobRegistry()
 
+# Scope for read/write access
+SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
 
-def func():
-    """Auto-replies to unread emails in Gmail inbox (within the same thread)."""
-    creds = None
+# How many Gemini calls the reply pipeline makes at once
+REPLY_WORKERS = int(os.getenv("REPLY_WORKERS", "4"))
 
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+# Local port for /metrics (Prometheus) and /metrics.json; 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            print("before flow")
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            print("after flow" )
-            creds = flow.run_local_server(port=0)
-            print("after after flow")
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+# Set STREAM_RESPONSES=1 to stream Gemini's answer instead of waiting for it whole
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "0") == "1"
 
-    try:
-        service = build("gmail", "v1", credentials=creds)
+# Credentials are loaded once and Gmail clients are shared across polls and
+# pipeline workers (one for polling plus one per fetch/send/mark worker)
+gmail_services = ServiceManager("gmail", "v1", SCOPES, pool_size=8)
 
-        # Step 1: Get unread messages
-        response = service.users().messages().list(userId="me", labelIds=["INBOX", "UNREAD"]).execute()
-        messages = response.get("messages", [])
-
-        if not messages:
-            print("No unread messages.")
-            return
-
-        print(f"Found {len(messages)} unread messages.")
-
-        for msg in messages:
-            msg_id = msg["id"]
-
-            # Get the full metadata of the message including thread ID and headers
-            message = service.users().messages().get(
-                userId="me",
-                id=msg_id,
-                format="metadata",
-                metadataHeaders=["From", "Subject", "Message-ID"]
-            ).execute()
-
-            headers = message["payload"]["headers"]
-            sender = subject = message_id_header = None
-
-            for h in headers:
-                if h["name"] == "From":
-                    sender = h["value"]
-                elif h["name"] == "Subject":
-                    subject = h["value"]
-                elif h["name"] == "Message-ID":
-                    message_id_header = h["value"]
-
-            thread_id = message.get("threadId")
-
-            if sender and message_id_header:
-                print(f"Replying to: {sender}, Subject: {subject}")
-                reply_subject = subject or "your message"
-                full_msg = service.users().messages().get(userId="me", id=msg_id, format="full").execute()
-                payload = full_msg.get("payload", {})
-                parts = payload.get("parts", [])
-
-                original_body = ""
-
-                # Try to find plain text part
-                for part in parts:
-                    if part.get("mimeType") == "text/plain":
-                        body_data = part.get("body", {}).get("data")
-                        if body_data:
-                            original_body = base64.urlsafe_b64decode(body_data).decode("utf-8").strip()
-                            break
-
-                # Fallback if there's no multipart
-                if not original_body and payload.get("mimeType") == "text/plain":
-                    body_data = payload.get("body", {}).get("data")
-                    if body_data:
-                        original_body = base64.urlsafe_b64decode(body_data).decode("utf-8").strip()
-
-                #make api call here
-                # Send prompt to Gemini
-                prompt = f"""Given this job description, About the job
+# Rate limits, retries and the circuit breaker every Gmail call goes through
+gmail = google_api.api("gmail")
+
+# Recruiter context for emails that don't match any posting in the jobs table
+RECRUITER_CONTEXT = """Given this job description, About the job
 We help the world run better
 
 At SAP, we keep it simple: you bring your best to us, and we'll bring out the best in you. We're builders touching over 20 industries and 80% of global commerce, and we need your unique talents to help shape what's next. The work is challenging – but it matters. You'll find a place where you can be yourself, prioritize your wellbeing, and truly belong. What's in it for you? Constant learning, skill growth, great benefits, and a team that wants you to grow and succeed.
@@ -203,39 +156,185 @@ Please note that any violation of these guidelines may result in disqualificatio
 Requisition ID: 431304 | Work Area: Information Technology | Expected Travel: 0 - 10% | Career Status: Student | Employment Type: Limited Full Time | Additional Locations: #SAPNextGen
 And given that the interview process will be a one hour interview, with two medium or easy leet code questions, with a code review and behavioural section towards the end of the interview.
 This is done with a single interviewer.
-When answering, make sure to never say that this context is provided by me. The context is from you, the AI recruiter.
-Given this context, answer the question from the candidate in a human way and keep it short and consise, like how a recruiter would and make sure to not say CANDIDATE NAME, make sure to not refer to the canditate by name. This is the question below, {original_body}."""
-                response = model.generate_content(prompt)
-
-                # Get the text
-                answer = response.text
-
-                # Print to console (optional)
-                print("Prompt:", prompt)
-                print("Response:", answer)
-
-                # Compose the reply
-                reply_body = f"{answer}" if original_body else "Sorry I couldn't get that. Can you resend you message?"  
-
-                reply_msg = create_reply_message(
-                    to=sender,
-                    subject=reply_subject,
-                    message_text=reply_body,
-                    thread_id=thread_id,
-                    message_id=message_id_header
+""" + RECRUITER_INSTRUCTIONS
+
+
+def create_message(to, subject, message_text):
+    """Create a message for an email reply."""
+    message = MIMEText(message_text)
+    message["to"] = to
+    message["subject"] = subject
+    raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
+    return {"raw": raw}
+
+
+def create_pipeline(service_factory=None, ledger=None, services=None, user="me", reply_workers=REPLY_WORKERS):
+    """Build the reply pipeline, with reply_workers concurrent LLM calls.
+
+    Progress is kept in the SQLite ledger at LEDGER_FILE unless another
+    ledger is passed in. Gmail clients come from services (default: the
+    token.json one); user keys the mailbox's Gmail rate limits.
+    """
+    if ledger is None:
+        ledger = SqliteLedger(os.getenv("LEDGER_FILE", LEDGER_FILE))
+    services = services or gmail_services
+    return ReplyPipeline(
+        service_factory=service_factory or services.acquire,
+        service_release=None if service_factory else services.release,
+        generate_reply=generate_reply,
+        send_reply=functools.partial(send_reply, user=user),
+        mark_read=functools.partial(mark_read, user=user),
+        ledger=ledger,
+        workers={"generate": reply_workers},
+        user=user,
+    )
+
+
+def func(sync=None, service=None, pipeline=None):
+    """Auto-replies to unread emails in Gmail inbox (within the same thread).
+
+    With a HistorySync only the messages added since the last poll are
+    fetched; without one the whole unread inbox is listed every time.
+    Pass the same pipeline on every call so its ledger can stop a message
+    from being replied to twice. Returns the number of messages looked at;
+    Gmail errors (and an open circuit) are logged and re-raised, so a failed
+    poll can't be mistaken for an empty inbox.
+    """
+    if service is None:
+        with gmail_services.service() as service:
+            return func(sync, service, pipeline)
+
+    if pipeline is None:
+        pipeline = create_pipeline()
+
+    try:
+        # Step 1: Get unread messages
+        if sync is not None:
+            msg_ids = sync.poll(service)
+        else:
+            with metrics.timer("gmail_call_seconds", call="list"):
+                response = gmail.execute(
+                    service.users().messages().list(userId="me", labelIds=["INBOX", "UNREAD"]), "messages.list",
+                    user=pipeline.user,
                 )
+            msg_ids = [msg["id"] for msg in response.get("messages", [])]
+
+        # Anything a previous run started but didn't finish goes first
+        resumed = pipeline.ledger.pending()
+        if resumed:
+            metrics.incr("pipeline_resumed_total", len(resumed), account=pipeline.user)
+        msg_ids = list(dict.fromkeys(resumed + msg_ids))
+
+        if not msg_ids:
+            logger.debug("No unread messages.")
+            return 0
+
+        logger.info("Found %d unread messages.", len(msg_ids))
+
+        # Step 2: Fetch, generate, send and mark read on the pipeline's worker pools
+        results = pipeline.run(msg_ids)
+
+        for msg_id, result in results.items():
+            if isinstance(result, Exception):
+                # A 404 means the message was deleted before we got to it;
+                # anything else stays pending and is retried on the next poll
+                logger.warning("Could not handle message %s: %s", msg_id, result)
+                metrics.incr("messages_total", result="error", account=pipeline.user)
+                if not (isinstance(result, HttpError) and result.resp.status == 404):
+                    continue
+                pipeline.ledger.forget(msg_id)
+            else:
+                metrics.incr("messages_total", result=result, account=pipeline.user)
+            if sync is not None:
+                sync.ack(msg_id)
+
+        return len(msg_ids)
+
+    except (HttpError, google_api.CircuitOpenError) as error:
+        logger.error("An error occurred: %s", error)
+        raise
+
+
+def generate_reply(message):
+    """Ask Gemini to answer the candidate's question."""
+    original_body = message["body"]
+    logger.info("Replying to: %s, Subject: %s", message['sender'], message['subject'])
+
+    if not original_body:
+        return "Sorry I couldn't get that. Can you resend you message?"
+
+    # Pick the posting this email is about, falling back to the default context
+    job = job_registry.route(message["subject"], message["thread_id"])
+    if job:
+        context_name, context = job["id"], job_registry.context_for(job)
+    else:
+        context_name, context = "default", RECRUITER_CONTEXT
+
+    # Someone already asked this about the same job, skip the LLM entirely
+    answer = answer_cache.get(context_name, original_body)
+    if answer is not None:
+        metrics.log_sampled(logger, "Response (cached): %s", answer)
+        return answer
+
+    # Send only the question; the job context is cached on Gemini's side
+    prompt = f"This is the question below, {original_body}."
+    model = prompt_cache.get_model(context, context_name)
+    with metrics.timer("llm_generate_seconds", stream=STREAM_RESPONSES):
+        if STREAM_RESPONSES:
+            answer, response = stream_answer(model, prompt)
+        else:
+            response = model.generate_content(prompt)
+
+            # Get the text
+            answer = response.text
+    metrics.count_tokens(response)
+    answer_cache.put(context_name, original_body, answer)
+
+    # Whole prompts and answers are kilobytes each; only log a sample of them
+    metrics.log_sampled(logger, "Prompt: %s", prompt)
+    metrics.log_sampled(logger, "Response: %s", answer)
+
+    return answer
+
+
+def stream_answer(model, prompt):
+    """Generate with stream=True and join the chunks as they arrive.
 
-                service.users().messages().send(userId="me", body=reply_msg).execute()
+    Returns the text and the last chunk, which carries the usage metadata.
+    """
+    started = time.perf_counter()
+    parts = []
+    chunk = None
+    for chunk in model.generate_content(prompt, stream=True):
+        if not parts:
+            metrics.observe("llm_first_token_seconds", time.perf_counter() - started)
+        parts.append(chunk.text)
+    return "".join(parts), chunk
 
-                # Mark the original message as read
-                service.users().messages().modify(
-                    userId="me",
-                    id=msg_id,
-                    body={"removeLabelIds": ["UNREAD"]}
-                ).execute()
 
-    except HttpError as error:
-        print(f"An error occurred: {error}")
+
+def send_reply(service, message, reply_body, user="me"):
+    """Send reply_body in the same thread as the original message."""
+    reply_msg = create_reply_message(
+        to=message["sender"],
+        subject=message["subject"] or "your message",
+        message_text=reply_body,
+        thread_id=message["thread_id"],
+        message_id=message["message_id_header"]
+    )
+
+    with metrics.timer("gmail_call_seconds", call="send"):
+        gmail.execute(service.users().messages().send(userId="me", body=reply_msg), "messages.send", user=user)
+
+
+def mark_read(service, msg_id, user="me"):
+    """Mark the original message as read."""
+    with metrics.timer("gmail_call_seconds", call="modify"):
+        gmail.execute(service.users().messages().modify(
+            userId="me",
+            id=msg_id,
+            body={"removeLabelIds": ["UNREAD"]}
+        ), "messages.modify", user=user)
 
 def create_reply_message(to, subject, message_text, thread_id, message_id):
     """Create a reply message that stays in the same thread."""
@@ -256,9 +355,20 @@ def create_reply_message(to, subject, message_text, thread_id, message_id):
     }
 
 def main():
+  metrics.setup_logging()
+  if METRICS_PORT:
+    metrics.serve(METRICS_PORT)
+  sync = HistorySync()
+  backoff = IdleBackoff()
+  pipeline = create_pipeline()
+  pipeline.ledger.compact()
   while(True):
-    func()
-    sleep(3)
+    try:
+      handled = func(sync, pipeline=pipeline)
+    except (HttpError, google_api.CircuitOpenError):
+      # Already logged; back off as if the inbox were idle
+      handled = 0
+    sleep(backoff.next_delay(handled > 0))
 
 if __name__ == "__main__":
     main()
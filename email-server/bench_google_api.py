@@ -0,0 +1,132 @@
+"""Throughput under Gmail's quota: bare retries vs the shared GoogleApi layer.
+
+Runs against a simulated server that grants `--quota` units per second and,
+like Gmail, answers a request over quota with a 429 and a Retry-After
+penalty during which everything is rejected. Clients are told the quota is
+--assumed-quota, to model several processes sharing one account:
+
+    python bench_google_api.py --sends 200 --workers 8 --quota 250 --assumed-quota 500 --error-rate 0.05
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+from google_api import QUOTA_UNITS, CircuitBreaker, GoogleApi
+
+
+def _http_error(status, reason, retry_after=None):
+    headers = {"status": status}
+    if retry_after is not None:
+        headers["retry-after"] = f"{retry_after:.2f}"
+    resp = httplib2.Response(headers)
+    resp.reason = reason
+    return HttpError(resp, reason.encode())
+
+
+class QuotaServer:
+    """Token bucket of `quota` units/s; going over it blocks the caller for `penalty` seconds."""
+
+    def __init__(self, quota: float, penalty: float = 1.0, latency: float = 0.02, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.quota = quota
+        self.penalty = penalty
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = quota
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.accepted = 0
+        self.throttled = 0
+        self.failed = 0
+
+    def call(self, cost):
+        time.sleep(self.latency)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.quota, self.tokens + (now - self.updated) * self.quota)
+            self.updated = now
+            if now < self.blocked_until:
+                self.throttled += 1
+                raise _http_error(429, "rateLimitExceeded", self.blocked_until - now)
+            if self.tokens < cost:
+                self.blocked_until = now + self.penalty
+                self.throttled += 1
+                raise _http_error(429, "rateLimitExceeded", self.penalty)
+            self.tokens -= cost
+            if self.random.random() < self.error_rate:
+                self.failed += 1
+                raise _http_error(503, "backendError")
+            self.accepted += 1
+            return {"id": f"sent{self.accepted}"}
+
+
+class SendRequest:
+    def __init__(self, server):
+        self.server = server
+
+    def execute(self):
+        return self.server.call(QUOTA_UNITS["messages.send"])
+
+
+def bare(server, max_attempts):
+    """A bare .execute() retried right away, at most max_attempts times."""
+    for attempt in range(max_attempts):
+        try:
+            return SendRequest(server).execute()
+        except HttpError:
+            if attempt == max_attempts - 1:
+                raise
+            time.sleep(0.01)
+
+
+def run(label, send, sends, workers, server):
+    def one(_):
+        try:
+            send()
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        ok = sum(pool.map(one, range(sends)))
+    elapsed = time.perf_counter() - start
+    ceiling = server.quota / QUOTA_UNITS["messages.send"]
+    print(f"{label:<10} {ok:4d}/{sends} sent in {elapsed:6.2f}s  {ok / elapsed:5.2f}/s "
+          f"({ok / elapsed / ceiling:4.0%} of quota)  429s={server.throttled} 5xx={server.failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--quota", type=float, default=250, help="units per second the server grants")
+    parser.add_argument("--assumed-quota", type=float, default=500, help="units per second clients think they have")
+    parser.add_argument("--penalty", type=float, default=1.0, help="seconds blocked after going over quota")
+    parser.add_argument("--error-rate", type=float, default=0.05,
+                        help="share of accepted calls that 503 (the send may have gone out, so it isn't retried)")
+    parser.add_argument("--attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"quota={args.quota} units/s ({args.quota / QUOTA_UNITS['messages.send']:.1f} sends/s), "
+          f"clients assume {args.assumed_quota}, {args.workers} workers\n")
+
+    server = QuotaServer(args.quota, args.penalty, error_rate=args.error_rate)
+    run("bare", lambda: bare(server, args.attempts), args.sends, args.workers, server)
+
+    server = QuotaServer(args.quota, args.penalty, error_rate=args.error_rate)
+    gmail = GoogleApi("gmail", args.assumed_quota, max_attempts=args.attempts, base_delay=0.1,
+                      breaker=CircuitBreaker("gmail", failure_threshold=args.workers * 2))
+    run("GoogleApi", lambda: gmail.execute(SendRequest(server), "messages.send"), args.sends, args.workers, server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Load test func() and its pipeline stages against fake Gmail and Gemini.
+
+No network or credentials needed. Two workloads:
+  backlog  all messages are waiting in the inbox before the first poll
+  burst    messages arrive in bursts, with a poll after each one
+
+Reports throughput and p50/p99 per entry point (func is one poll). Save a run
+with --save and compare later runs with --baseline to catch regressions:
+
+    python bench_load.py --workload backlog --messages 200 --gmail-latency 0.02 --llm-latency 0.5
+    python bench_load.py --workload burst --bursts 20 --burst-size 10 --error-rate 0.05 --save base.json
+    python bench_load.py --workload burst --bursts 20 --burst-size 10 --error-rate 0.05 --baseline base.json
+
+--record answers.json calls the real Gemini model once (needs GEMINI_API_KEY)
+and saves its answers; --answers answers.json replays them offline.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import loadtest
+from fake_gemini import FakeModel, FakePromptCache, RecordingPromptCache, load_answers
+from fake_gmail import FakeGmailService
+from gmail_sync import HistorySync
+from ledger import SqliteLedger
+
+os.environ.setdefault("METRICS_PORT", "0")
+import app  # noqa: E402  (reads its settings from the environment on import)
+
+QUESTIONS = [
+    "How long is the interview?",
+    "What languages should I prepare in?",
+    "When would the internship start?",
+    "Is the role remote or on site?",
+    "How many interviewers will there be?",
+    "What is the pay range for this position?",
+    "Do I need to know Java already?",
+    "Will there be a behavioural section?",
+]
+
+
+def inbox_messages(count, rng, repeat_share):
+    """Synthetic candidate emails; a share repeat_share ask a question verbatim that others also ask."""
+    for i in range(count):
+        question = rng.choice(QUESTIONS)
+        if rng.random() >= repeat_share:
+            question = f"{question} I applied as candidate #{i}."
+        yield f"candidate{i}@example.com", "Question about the SAP internship", question
+
+
+def poll_until_drained(recorder, service, sync, pipeline, max_polls):
+    for _ in range(max_polls):
+        try:
+            with recorder.phase("func", "generate_reply", "send_reply", "mark_read"), recorder.time("func"):
+                app.func(sync, service, pipeline)
+        except Exception:
+            # Counted as an error by the recorder; the next poll tries again
+            pass
+        unread = [m for m in service.mailbox.values() if "UNREAD" in m["labelIds"]]
+        if not unread and not pipeline.ledger.pending():
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", choices=("backlog", "burst"), default="backlog")
+    parser.add_argument("--messages", type=int, default=200, help="inbox size for the backlog workload")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--repeat-share", type=float, default=0.3, help="share of questions asked verbatim before")
+    parser.add_argument("--gmail-latency", type=float, default=0.02, help="seconds per Gmail call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per Gemini call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of Gmail and Gemini calls that fail")
+    parser.add_argument("--stream", action="store_true", help="stream Gemini answers (STREAM_RESPONSES=1)")
+    parser.add_argument("--max-polls", type=int, default=50, help="give up draining after this many polls")
+    parser.add_argument("--answers", help="replay answers recorded with --record")
+    parser.add_argument("--record", help="call the real Gemini model and save its answers here")
+    parser.add_argument("--seed", type=int, default=7)
+    loadtest.add_arguments(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    model = FakeModel(args.llm_latency, args.error_rate, load_answers(args.answers) if args.answers else None,
+                      seed=args.seed)
+    app.prompt_cache = RecordingPromptCache(app.prompt_cache) if args.record else FakePromptCache(model)
+    app.job_registry.set_jobs([])
+    app.STREAM_RESPONSES = args.stream
+    service = FakeGmailService(latency=args.gmail_latency, error_rate=args.error_rate, seed=args.seed)
+    recorder = loadtest.Recorder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = HistorySync(os.path.join(tmp, "sync_state.json"))
+        pipeline = app.create_pipeline(service_factory=lambda: service,
+                                       ledger=SqliteLedger(os.path.join(tmp, "ledger.db")))
+        pipeline.generate_reply = recorder.timed("generate_reply", pipeline.generate_reply)
+        pipeline.send_reply = recorder.timed("send_reply", pipeline.send_reply)
+        pipeline.mark_read = recorder.timed("mark_read", pipeline.mark_read)
+
+        if args.workload == "backlog":
+            for message in inbox_messages(args.messages, rng, args.repeat_share):
+                service.add_message(*message)
+            drained = poll_until_drained(recorder, service, sync, pipeline, args.max_polls)
+        else:
+            messages = inbox_messages(args.bursts * args.burst_size, rng, args.repeat_share)
+            for _ in range(args.bursts):
+                for _ in range(args.burst_size):
+                    service.add_message(*next(messages))
+                drained = poll_until_drained(recorder, service, sync, pipeline, args.max_polls)
+        pipeline.ledger.close()
+
+    print(f"workload={args.workload} gmail_latency={args.gmail_latency}s llm_latency={args.llm_latency}s "
+          f"error_rate={args.error_rate} sent={len(service.sent)} gmail_errors={service.errors} "
+          f"llm_calls={model.calls} llm_errors={model.errors}\n")
+    if not drained:
+        print(f"Inbox not drained after {args.max_polls} polls\n")
+    if args.record:
+        app.prompt_cache.save(args.record)
+        print(f"Saved {len(app.prompt_cache.answers)} answers to {args.record}\n")
+    sys.exit(loadtest.finish(args, recorder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-call overhead of getting a Gmail client: old way vs ServiceManager.
+
+Uses a throwaway token.json with a far-future expiry, so nothing touches the
+network (build() reads the discovery document bundled with the library):
+
+    python bench_services.py --calls 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+from google_services import ServiceManager
+
+SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
+
+
+def write_token(path):
+    with open(path, "w") as f:
+        json.dump({
+            "token": "fake-access-token",
+            "refresh_token": "fake-refresh-token",
+            "client_id": "fake-client-id",
+            "client_secret": "fake-client-secret",
+            "scopes": SCOPES,
+            "expiry": (datetime.utcnow() + timedelta(days=1)).isoformat() + "Z",
+        }, f)
+
+
+def report(label, calls, elapsed):
+    print(f"{label:<16} {elapsed / calls * 1000:8.3f} ms/call   ({calls} calls, {elapsed:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        token_file = os.path.join(tmp, "token.json")
+        write_token(token_file)
+
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+            build("gmail", "v1", credentials=creds)
+        report("load + build", args.calls, time.perf_counter() - start)
+
+        manager = ServiceManager("gmail", "v1", SCOPES, token_file=token_file)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            with manager.service():
+                pass
+        report("ServiceManager", args.calls, time.perf_counter() - start)
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
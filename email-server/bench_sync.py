@@ -0,0 +1,76 @@
+"""Compare full unread-inbox polling against incremental history sync.
+
+Runs entirely against FakeGmailService, no network or credentials needed:
+
+    python bench_sync.py --backlog 500 --polls 100 --latency 0.02
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fake_gmail import FakeGmailService
+from gmail_sync import HistorySync
+
+
+def seed(service, backlog):
+    for i in range(backlog):
+        service.add_message(f"candidate{i}@example.com", "Question", "How long is the interview?")
+
+
+def full_scan(service):
+    """What the old loop did each tick: page through every unread message."""
+    msg_ids = []
+    page_token = None
+    while True:
+        response = service.users().messages().list(
+            userId="me", labelIds=["INBOX", "UNREAD"], pageToken=page_token
+        ).execute()
+        msg_ids.extend(m["id"] for m in response.get("messages", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return msg_ids
+
+
+def run(label, service, poll, polls, new_every):
+    start = time.perf_counter()
+    seen = 0
+    for i in range(polls):
+        if new_every and i % new_every == 0:
+            service.add_message("new@example.com", "Question", "When would I start?")
+        seen += len(poll())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed * 1000:9.1f} ms   {sum(service.calls.values()):6d} API calls   {seen:7d} IDs returned")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backlog", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--new-every", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per API call")
+    args = parser.parse_args()
+
+    print(f"backlog={args.backlog} polls={args.polls} latency={args.latency}s\n")
+
+    service = FakeGmailService(latency=args.latency)
+    seed(service, args.backlog)
+    run("full scan", service, lambda: full_scan(service), args.polls, args.new_every)
+
+    service = FakeGmailService(latency=args.latency)
+    seed(service, args.backlog)
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = HistorySync(os.path.join(tmp, "sync_state.json"))
+
+        def poll():
+            # Ack everything so each poll only returns what is actually new
+            msg_ids = sync.poll(service)
+            for msg_id in msg_ids:
+                sync.ack(msg_id)
+            return msg_ids
+
+        run("incremental", service, poll, args.polls, args.new_every)
+
+
+if __name__ == "__main__":
+    main()
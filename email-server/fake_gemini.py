@@ -0,0 +1,129 @@
+"""Offline stand-in for google.generativeai models, for benchmarks and load tests.
+
+FakeModel answers generate_content() like GenerativeModel does, with or
+without stream=True, from a list of canned answers. The answers can be
+recorded from the real model once with RecordingPromptCache and replayed
+from then on, so a load test sees realistic reply sizes without calling Gemini.
+"""
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+
+DEFAULT_ANSWERS = [
+    "Thanks for reaching out! The interview is one hour: two easy or medium coding questions, "
+    "a short code review and a behavioural section at the end.",
+    "The internship runs from January 5 to August 28, 2026, on site in Vancouver, 40 hours a week.",
+    "You'll be working with HTML, CSS, JavaScript or Java, and some cloud computing. Good luck!",
+]
+
+CHARS_PER_TOKEN = 4
+
+
+def load_answers(path: str):
+    """Answers saved by RecordingPromptCache (a JSON list of strings)."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _response(text, prompt):
+    usage = SimpleNamespace(
+        prompt_token_count=len(prompt) // CHARS_PER_TOKEN,
+        candidates_token_count=len(text) // CHARS_PER_TOKEN,
+        cached_content_token_count=0,
+    )
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeModel:
+    """A GenerativeModel that sleeps instead of calling Gemini.
+
+    Each call takes `latency` seconds (split over the chunks when
+    streaming) and a share `error_rate` of calls raise ResourceExhausted,
+    the 429 the real client raises. Answers cycle through `answers` in
+    order and failures come from a seeded RNG, so every run with the same
+    arguments is the same.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, answers=None, chunks: int = 5,
+                 seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.answers = answers or DEFAULT_ANSWERS
+        self.chunks = chunks
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.prompts = []
+
+    def _next(self, prompt):
+        with self.lock:
+            answer = self.answers[self.calls % len(self.answers)]
+            self.calls += 1
+            self.prompts.append(prompt)
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return answer, fail
+
+    def generate_content(self, prompt, stream: bool = False):
+        answer, fail = self._next(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            if fail:
+                raise exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+            return _response(answer, prompt)
+        return self._stream(answer, prompt, fail)
+
+    def _stream(self, answer, prompt, fail):
+        size = max(1, -(-len(answer) // self.chunks))
+        pieces = [answer[i:i + size] for i in range(0, len(answer), size)] or [""]
+        for i, piece in enumerate(pieces):
+            time.sleep(self.latency / len(pieces))
+            if fail:
+                raise exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+            if i == len(pieces) - 1:
+                yield _response(piece, prompt)
+            else:
+                yield SimpleNamespace(text=piece, usage_metadata=None)
+
+
+class FakePromptCache:
+    """Drop-in for PromptCache that hands out the same FakeModel for every context."""
+
+    def __init__(self, model: FakeModel):
+        self.model = model
+
+    def get_model(self, context: str, name: str = "default"):
+        return self.model
+
+
+class RecordingPromptCache:
+    """Wraps the real PromptCache and keeps every answer its models give, to replay with FakeModel."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.answers = []
+
+    def get_model(self, context: str, name: str = "default"):
+        return RecordingModel(self.cache.get_model(context, name), self.answers)
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.answers, f, indent=2)
+
+
+class RecordingModel:
+    def __init__(self, model, answers):
+        self.model = model
+        self.answers = answers
+
+    def generate_content(self, prompt, stream: bool = False):
+        # Recorded whole either way; a one-chunk stream is still a valid stream
+        response = self.model.generate_content(prompt)
+        self.answers.append(response.text)
+        return iter([response]) if stream else response
@@ -0,0 +1,244 @@
+"""In-memory stand-in for the Gmail API client, for local runs and benchmarks.
+
+Only the calls the email server makes are implemented. Every call returns a
+request object with .execute(), like googleapiclient does.
+"""
+import base64
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def _http_error(status, reason):
+    resp = httplib2.Response({"status": status})
+    resp.reason = reason
+    return HttpError(resp, reason.encode())
+
+
+class FakeRequest:
+    def __init__(self, service, name, fn):
+        self.service = service
+        self.name = name
+        self.fn = fn
+
+    def execute(self):
+        self.service.calls[self.name] += 1
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        self.service.maybe_fail()
+        return self.fn()
+
+
+class FakeBatch:
+    """Mirrors BatchHttpRequest: one round trip, a callback per sub-request."""
+
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self.requests) + 1)
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self):
+        self.service.calls["batch"] += 1
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        for request_id, request, callback in self.requests:
+            self.service.calls[request.name] += 1
+            try:
+                self.service.maybe_fail()
+                response, exception = request.fn(), None
+            except HttpError as error:
+                response, exception = None, error
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeGmailService:
+    """A single fake mailbox. Use add_message() to simulate incoming mail.
+
+    A share `error_rate` of calls (and of batch sub-requests) fail with
+    `error_status`; pass a seed to get the same failures on every run.
+    """
+
+    def __init__(self, latency: float = 0.0, page_size: int = 100, error_rate: float = 0.0,
+                 error_status: int = 500, seed: int = None):
+        self.latency = latency
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.calls = Counter()
+        self.mailbox = {}
+        self.sent = []
+        self.history_log = []
+        self.history_id = 1000
+        self.min_history_id = 1000
+        self._ids = itertools.count(1)
+
+    # Helpers for driving the fake
+
+    def add_message(self, sender, subject, body, thread_id=None, unread=True):
+        n = next(self._ids)
+        msg_id = f"msg{n:06d}"
+        data = base64.urlsafe_b64encode(body.encode()).decode()
+        labels = ["INBOX", "UNREAD"] if unread else ["INBOX"]
+        self.mailbox[msg_id] = {
+            "id": msg_id,
+            "threadId": thread_id or f"thread{n:06d}",
+            "labelIds": labels,
+            "payload": {
+                "mimeType": "multipart/alternative",
+                "headers": [
+                    {"name": "From", "value": sender},
+                    {"name": "Subject", "value": subject},
+                    {"name": "Message-ID", "value": f"<{msg_id}@fake.mail>"},
+                ],
+                "parts": [{"mimeType": "text/plain", "body": {"data": data}}],
+            },
+        }
+        self._record({"messagesAdded": [{"message": self._minimal(msg_id)}]})
+        return msg_id
+
+    def maybe_fail(self):
+        """Raise the injected error for a share error_rate of calls."""
+        if not self.error_rate:
+            return
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            raise _http_error(self.error_status, "rateLimitExceeded" if self.error_status == 429 else "backendError")
+
+    def expire_history(self):
+        """Pretend Gmail dropped all history up to now."""
+        self.min_history_id = self.history_id + 1
+
+    def _record(self, change):
+        self.history_id += 1
+        self.history_log.append(dict(change, id=str(self.history_id)))
+
+    def _minimal(self, msg_id):
+        message = self.mailbox[msg_id]
+        return {
+            "id": msg_id,
+            "threadId": message["threadId"],
+            "labelIds": list(message["labelIds"]),
+        }
+
+    # googleapiclient-shaped surface
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return _FakeMessages(self)
+
+    def history(self):
+        return _FakeHistory(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def getProfile(self, userId):
+        return FakeRequest(self, "getProfile", lambda: {"historyId": str(self.history_id)})
+
+
+class _FakeMessages:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, labelIds=None, pageToken=None, maxResults=None, **kwargs):
+        def run():
+            wanted = set(labelIds or [])
+            ids = [
+                msg_id
+                for msg_id, m in self.service.mailbox.items()
+                if wanted.issubset(m["labelIds"])
+            ]
+            start = int(pageToken or 0)
+            size = maxResults or self.service.page_size
+            page = ids[start:start + size]
+            response = {"messages": [{"id": i, "threadId": self.service.mailbox[i]["threadId"]} for i in page]}
+            if start + size < len(ids):
+                response["nextPageToken"] = str(start + size)
+            return response
+        return FakeRequest(self.service, "messages.list", run)
+
+    def get(self, userId, id, format="full", metadataHeaders=None):
+        def run():
+            if id not in self.service.mailbox:
+                raise _http_error(404, "Not Found")
+            message = self.service.mailbox[id]
+            if format == "metadata":
+                headers = [
+                    h for h in message["payload"]["headers"]
+                    if not metadataHeaders or h["name"] in metadataHeaders
+                ]
+                return dict(message, payload={"headers": headers})
+            return message
+        return FakeRequest(self.service, "messages.get", run)
+
+    def send(self, userId, body):
+        def run():
+            self.service.sent.append(body)
+            return {"id": f"sent{len(self.service.sent):06d}", "threadId": body.get("threadId")}
+        return FakeRequest(self.service, "messages.send", run)
+
+    def modify(self, userId, id, body):
+        def run():
+            if id not in self.service.mailbox:
+                raise _http_error(404, "Not Found")
+            labels = self.service.mailbox[id]["labelIds"]
+            for label in body.get("removeLabelIds", []):
+                if label in labels:
+                    labels.remove(label)
+            for label in body.get("addLabelIds", []):
+                if label not in labels:
+                    labels.append(label)
+            self.service._record({"labelsRemoved": [{"message": self.service._minimal(id)}]})
+            return self.service._minimal(id)
+        return FakeRequest(self.service, "messages.modify", run)
+
+
+HISTORY_KEYS = {
+    "messageAdded": "messagesAdded",
+    "messageDeleted": "messagesDeleted",
+    "labelAdded": "labelsAdded",
+    "labelRemoved": "labelsRemoved",
+}
+
+
+class _FakeHistory:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, startHistoryId, historyTypes=None, labelId=None, pageToken=None, **kwargs):
+        def run():
+            start = int(startHistoryId)
+            if start < self.service.min_history_id:
+                raise _http_error(404, "Requested entity was not found.")
+            records = []
+            for record in self.service.history_log:
+                if int(record["id"]) <= start:
+                    continue
+                if historyTypes and not any(HISTORY_KEYS[t] in record for t in historyTypes):
+                    continue
+                if labelId:
+                    changes = next(v for k, v in record.items() if k != "id")
+                    if not any(labelId in c["message"]["labelIds"] for c in changes):
+                        continue
+                records.append(record)
+            return {"history": records, "historyId": str(self.service.history_id)}
+        return FakeRequest(self.service, "history.list", run)
+
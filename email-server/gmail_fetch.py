@@ -0,0 +1,93 @@
+import base64
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+
+# Gmail accepts up to 100 calls per batch but starts rate limiting well before
+# that, so Google recommends keeping batches at 50 or fewer
+MAX_BATCH_SIZE = 50
+
+
+def fetch_messages(service, msg_ids, chunk_size: int = MAX_BATCH_SIZE, user: str = "me"):
+    """Fetch messages in format="full" using batched HTTP requests.
+
+    Returns (messages, errors): both dicts keyed by message ID. A failed get
+    only lands in errors, it does not stop the rest of the batch. Gets that
+    were throttled or hit a server error are batched up again after a
+    backoff, up to the Gmail API's max_attempts. user picks the rate limit
+    bucket, as in GoogleApi.execute().
+    """
+    messages = {}
+    errors = {}
+    gmail = google_api.api("gmail")
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            messages[request_id] = response
+
+    msg_ids = list(dict.fromkeys(msg_ids))
+    for i in range(0, len(msg_ids), chunk_size):
+        chunk = msg_ids[i:i + chunk_size]
+        for attempt in range(gmail.max_attempts):
+            batch = service.new_batch_http_request(callback=callback)
+            for msg_id in chunk:
+                batch.add(
+                    service.users().messages().get(userId="me", id=msg_id, format="full"),
+                    request_id=msg_id,
+                )
+            with metrics.timer("gmail_call_seconds", call="get_batch"):
+                gmail.execute(batch, "batch", user=user, cost=google_api.QUOTA_UNITS["messages.get"] * len(chunk))
+            retry = [msg_id for msg_id in chunk if msg_id in errors and google_api.is_retryable(errors[msg_id])]
+            if not retry or attempt == gmail.max_attempts - 1:
+                break
+            metrics.incr("google_api_retries_total", len(retry), api="gmail", method="messages.get", status="batch")
+            gmail.note_error(errors[retry[0]], user)
+            gmail.wait_before_retry(attempt, errors[retry[0]])
+            for msg_id in retry:
+                del errors[msg_id]
+            chunk = retry
+        metrics.incr("gmail_messages_fetched_total", min(chunk_size, len(msg_ids) - i))
+
+    return messages, errors
+
+
+def parse_message(message):
+    """Pull the headers and plain text body we care about out of a full message."""
+    payload = message.get("payload", {})
+    sender = subject = message_id_header = None
+
+    for h in payload.get("headers", []):
+        if h["name"] == "From":
+            sender = h["value"]
+        elif h["name"] == "Subject":
+            subject = h["value"]
+        elif h["name"] == "Message-ID":
+            message_id_header = h["value"]
+
+    original_body = ""
+
+    # Try to find plain text part
+    for part in payload.get("parts", []):
+        if part.get("mimeType") == "text/plain":
+            body_data = part.get("body", {}).get("data")
+            if body_data:
+                original_body = base64.urlsafe_b64decode(body_data).decode("utf-8").strip()
+                break
+
+    # Fallback if there's no multipart
+    if not original_body and payload.get("mimeType") == "text/plain":
+        body_data = payload.get("body", {}).get("data")
+        if body_data:
+            original_body = base64.urlsafe_b64decode(body_data).decode("utf-8").strip()
+
+    return {
+        "id": message.get("id"),
+        "thread_id": message.get("threadId"),
+        "sender": sender,
+        "subject": subject,
+        "message_id_header": message_id_header,
+        "body": original_body,
+    }
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+
+from googleapiclient.errors import HttpError
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Stores the last seen historyId plus any message IDs we still owe a reply to
+SYNC_STATE_FILE = "sync_state.json"
+
+
+class HistorySync:
+    """Incremental inbox sync built on users().history().list.
+
+    The first poll (or a poll after the stored historyId has expired) does a
+    full scan of unread inbox messages. Every poll after that only asks Gmail
+    for what changed since the last historyId.
+    """
+
+    def __init__(self, state_file: str = SYNC_STATE_FILE, user: str = "me"):
+        self.state_file = state_file
+        self.user = user
+        self.history_id = None
+        self.pending = []
+        self.load_state()
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return
+        with open(self.state_file) as f:
+            state = json.load(f)
+        self.history_id = state.get("historyId")
+        self.pending = state.get("pending", [])
+
+    def save_state(self):
+        # Write to a temp file first so a crash never leaves half a JSON file
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"historyId": self.history_id, "pending": self.pending}, f)
+        os.replace(tmp_path, self.state_file)
+
+    def full_sync(self, service):
+        """List every unread inbox message and reset the history cursor."""
+        # Grab the cursor before listing so nothing that arrives mid-scan is lost
+        gmail = google_api.api("gmail")
+        history_id = gmail.execute(service.users().getProfile(userId="me"), "getProfile", user=self.user)["historyId"]
+
+        msg_ids = []
+        page_token = None
+        while True:
+            with metrics.timer("gmail_call_seconds", call="list"):
+                response = gmail.execute(service.users().messages().list(
+                    userId="me",
+                    labelIds=["INBOX", "UNREAD"],
+                    pageToken=page_token,
+                ), "messages.list", user=self.user)
+            msg_ids.extend(m["id"] for m in response.get("messages", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        self.history_id = history_id
+        self.pending = msg_ids
+        self.save_state()
+        return list(self.pending)
+
+    def poll(self, service):
+        """Return IDs of unread inbox messages that still need a reply."""
+        if self.history_id is None:
+            return self.full_sync(service)
+
+        new_ids = []
+        page_token = None
+        history_id = self.history_id
+        gmail = google_api.api("gmail")
+        try:
+            while True:
+                with metrics.timer("gmail_call_seconds", call="history"):
+                    response = gmail.execute(service.users().history().list(
+                        userId="me",
+                        startHistoryId=self.history_id,
+                        historyTypes=["messageAdded"],
+                        labelId="INBOX",
+                        pageToken=page_token,
+                    ), "history.list", user=self.user)
+                for record in response.get("history", []):
+                    for added in record.get("messagesAdded", []):
+                        message = added["message"]
+                        if "UNREAD" in message.get("labelIds", []):
+                            new_ids.append(message["id"])
+                history_id = response.get("historyId", history_id)
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+        except HttpError as error:
+            # Gmail only keeps history for about a week; a 404 means our cursor
+            # is too old and the only way back is a full resync
+            if error.resp.status == 404:
+                logger.warning("History ID expired, running full resync.")
+                metrics.incr("gmail_history_resyncs_total")
+                return self.full_sync(service)
+            raise
+
+        for msg_id in new_ids:
+            if msg_id not in self.pending:
+                self.pending.append(msg_id)
+        self.history_id = history_id
+        self.save_state()
+        return list(self.pending)
+
+    def ack(self, msg_id):
+        """Forget a message once it has been handled."""
+        if msg_id in self.pending:
+            self.pending.remove(msg_id)
+            self.save_state()
+
+
+class IdleBackoff:
+    """Poll delay that grows while the inbox is idle and resets on new mail."""
+
+    def __init__(self, min_delay: float = 3, max_delay: float = 60, factor: float = 2):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.delay = min_delay
+
+    def next_delay(self, found_work: bool) -> float:
+        if found_work:
+            self.delay = self.min_delay
+        else:
+            self.delay = min(self.delay * self.factor, self.max_delay)
+        return self.delay
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Local copy of the jobs table so the responder still works offline
+JOBS_SNAPSHOT_FILE = "jobs.json"
+
+# Seconds between reloads of the jobs table, so edited postings reach the
+# rendered contexts and the Gemini prompt caches without a restart
+JOB_REFRESH_SECONDS = float(os.getenv("JOB_REFRESH_SECONDS", "300"))
+
+# After a failed load, wait this long before asking Supabase again
+JOB_RETRY_SECONDS = 30
+
+# How the recruiter should answer, shared by every job's context
+RECRUITER_INSTRUCTIONS = """When answering, make sure to never say that this context is provided by me. The context is from you, the AI recruiter.
+Given this context, answer the question from the candidate in a human way and keep it short and consise, like how a recruiter would and make sure to not say CANDIDATE NAME, make sure to not refer to the canditate by name."""
+
+UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+SUBJECT_PREFIX_RE = re.compile(r"^((re|fw|fwd)\s*:\s*)+", re.IGNORECASE)
+
+
+def normalize_title(text: str) -> str:
+    text = SUBJECT_PREFIX_RE.sub("", text or "")
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def render_context(job) -> str:
+    """Turn a jobs row into the recruiter context sent to Gemini."""
+    lines = [
+        "Given this job description, About the job",
+        f"Position Title: {job['title']}",
+        f"Department: {job['department']}",
+        f"Location: {job['location']}",
+        f"Employment Type: {job['type']}",
+    ]
+    if job.get("salary_range"):
+        lines.append(f"Salary Range: {job['salary_range']}")
+    lines += ["", job["description"], "", "Requirements:"]
+    lines += [f"- {r}" for r in job.get("requirements", [])]
+    lines += ["", "Responsibilities:"]
+    lines += [f"- {r}" for r in job.get("responsibilities", [])]
+    lines += ["", RECRUITER_INSTRUCTIONS]
+    return "\n".join(lines)
+
+
+class JobRegistry:
+    """Active job postings indexed by ID and title, for routing emails to a job.
+
+    Postings are loaded from Supabase and reloaded every refresh_seconds
+    (falling back to the jobs.json snapshot when offline). route() matches an email to a job by thread, by a
+    job ID in the subject, or by the job title appearing in the subject; each
+    of those is a dict lookup, so the cost doesn't grow with the number of
+    jobs. Rendered contexts are kept in a small LRU cache.
+    """
+
+    def __init__(self, snapshot_file: str = JOBS_SNAPSHOT_FILE, cache_size: int = 32,
+                 refresh_seconds: float = JOB_REFRESH_SECONDS):
+        self.snapshot_file = snapshot_file
+        self.cache_size = cache_size
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        # True once jobs came from Supabase (or set_jobs); the snapshot doesn't count
+        self.loaded = False
+        self.next_load = 0.0
+        self.by_id = {}
+        self.by_title = {}
+        self.max_title_words = 0
+        self.threads = OrderedDict()
+        self.contexts = OrderedDict()
+
+    def fetch_jobs(self):
+        """Read active jobs from the Supabase REST API."""
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            raise RuntimeError("SUPABASE_URL / SUPABASE_KEY not set")
+        req = urllib.request.Request(
+            f"{url}/rest/v1/jobs?select=*&status=eq.active",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+        )
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return json.load(resp)
+
+    def load(self):
+        """Fetch the jobs from Supabase; on failure keep what's loaded and try again later."""
+        try:
+            jobs = self.fetch_jobs()
+            tmp_path = f"{self.snapshot_file}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(jobs, f)
+            os.replace(tmp_path, self.snapshot_file)
+        except Exception as error:
+            self.next_load = time.monotonic() + min(JOB_RETRY_SECONDS, self.refresh_seconds)
+            if self.loaded:
+                logger.warning("Could not reload jobs (%s), keeping the ones loaded", error)
+            elif not os.path.exists(self.snapshot_file):
+                logger.error("Could not load jobs: %s", error)
+            else:
+                logger.warning("Could not reach Supabase (%s), using %s", error, self.snapshot_file)
+                with open(self.snapshot_file) as f:
+                    self._index(json.load(f))
+            return
+        self.set_jobs(jobs)
+
+    def _ensure_loaded(self):
+        if time.monotonic() < self.next_load:
+            return
+        # Once there are jobs, only one caller reloads; the rest go on with the current ones
+        if not self.load_lock.acquire(blocking=not self.loaded):
+            return
+        try:
+            if time.monotonic() >= self.next_load:
+                self.load()
+        finally:
+            self.load_lock.release()
+
+    def set_jobs(self, jobs):
+        """Replace the indexed jobs, dropping cached contexts for any that changed.
+
+        They count as fresh for refresh_seconds.
+        """
+        self._index(jobs)
+        self.loaded = True
+        self.next_load = time.monotonic() + self.refresh_seconds
+
+    def _index(self, jobs):
+        by_id = {job["id"]: job for job in jobs if job.get("status", "active") == "active"}
+        by_title = {}
+        for job in by_id.values():
+            by_title.setdefault(normalize_title(job["title"]), job["id"])
+
+        with self.lock:
+            for job_id in list(self.contexts):
+                if by_id.get(job_id) != self.by_id.get(job_id):
+                    del self.contexts[job_id]
+            self.by_id = by_id
+            self.by_title = by_title
+            self.max_title_words = max((len(t.split()) for t in by_title), default=0)
+
+    def get(self, job_id):
+        self._ensure_loaded()
+        return self.by_id.get(job_id)
+
+    def route(self, subject, thread_id=None):
+        """Find the job an email is about, or None if nothing matches."""
+        self._ensure_loaded()
+
+        with self.lock:
+            if thread_id in self.threads:
+                self.threads.move_to_end(thread_id)
+                return self.by_id.get(self.threads[thread_id])
+
+        job_id = None
+        for candidate in UUID_RE.findall((subject or "").lower()):
+            if candidate in self.by_id:
+                job_id = candidate
+                break
+
+        if job_id is None:
+            # Check every run of words in the subject that could be a title,
+            # longest first, so "Senior Frontend Engineer" beats "Engineer"
+            words = normalize_title(subject).split()
+            for size in range(min(len(words), self.max_title_words), 0, -1):
+                for start in range(len(words) - size + 1):
+                    job_id = self.by_title.get(" ".join(words[start:start + size]))
+                    if job_id:
+                        break
+                if job_id:
+                    break
+
+        if job_id and thread_id:
+            with self.lock:
+                self.threads[thread_id] = job_id
+                if len(self.threads) > 10000:
+                    self.threads.popitem(last=False)
+        return self.by_id.get(job_id) if job_id else None
+
+    def context_for(self, job) -> str:
+        """Rendered recruiter context for a job, from the LRU cache when possible."""
+        with self.lock:
+            if job["id"] in self.contexts:
+                self.contexts.move_to_end(job["id"])
+                return self.contexts[job["id"]]
+
+        context = render_context(job)
+        with self.lock:
+            self.contexts[job["id"]] = context
+            if len(self.contexts) > self.cache_size:
+                self.contexts.popitem(last=False)
+        return context
+
+    def invalidate(self, job_id=None):
+        """Forget one job's rendered context, or all of them."""
+        with self.lock:
+            if job_id is None:
+                self.contexts.clear()
+            else:
+                self.contexts.pop(job_id, None)
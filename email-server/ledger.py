@@ -0,0 +1,104 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from pipeline import STATES
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FILE = "ledger.db"
+
+# Finished entries are kept this long so a late duplicate notification is still skipped
+RETENTION_SECONDS = 30 * 24 * 3600
+
+
+class SqliteLedger:
+    """MemoryLedger that survives restarts, backed by SQLite in WAL mode.
+
+    Every advance() is committed before it returns, so a crash between
+    sending a reply and marking the email read leaves the message at
+    "sent" and the next run only marks it. Entries are also kept in a dict,
+    so checking whether a message is done never touches the disk. Finished
+    entries older than retention are dropped by compact().
+    """
+
+    def __init__(self, path: str = LEDGER_FILE, retention: float = RETENTION_SECONDS):
+        self.path = path
+        self.retention = retention
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # A commit in WAL mode with NORMAL sync survives a process crash
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ledger ("
+            "msg_id TEXT PRIMARY KEY, state INTEGER NOT NULL, data TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ledger_state ON ledger (state, updated)")
+        self.db.commit()
+        self.entries = {}
+        for msg_id, state, data in self.db.execute("SELECT msg_id, state, data FROM ledger"):
+            self.entries[msg_id] = dict(json.loads(data), state=STATES[state])
+
+    def get(self, msg_id):
+        with self.lock:
+            entry = self.entries.get(msg_id)
+            return dict(entry) if entry else None
+
+    def advance(self, msg_id, state, **data):
+        with self.lock:
+            entry = dict(self.entries.get(msg_id, {}), **data)
+            entry["state"] = state
+            if state == "marked":
+                # The reply text is only needed until it has been sent
+                entry.pop("reply", None)
+            stored = {k: v for k, v in entry.items() if k != "state"}
+            self.db.execute(
+                "INSERT OR REPLACE INTO ledger VALUES (?, ?, ?, ?)",
+                (msg_id, STATES.index(state), json.dumps(stored), time.time()),
+            )
+            self.db.commit()
+            self.entries[msg_id] = entry
+
+    def reached(self, msg_id, state) -> bool:
+        entry = self.get(msg_id)
+        return entry is not None and STATES.index(entry["state"]) >= STATES.index(state)
+
+    def pending(self):
+        """IDs that were started but never marked read, oldest first, leaving out parked ones."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT msg_id FROM ledger WHERE state < ? ORDER BY updated", (STATES.index("marked"),)
+            ).fetchall()
+            return [msg_id for (msg_id,) in rows if not self.entries[msg_id].get("parked")]
+
+    def forget(self, msg_id):
+        with self.lock:
+            self.db.execute("DELETE FROM ledger WHERE msg_id = ?", (msg_id,))
+            self.db.commit()
+            self.entries.pop(msg_id, None)
+
+    def compact(self):
+        """Drop finished entries past retention and give the space back."""
+        cutoff = time.time() - self.retention
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT msg_id FROM ledger WHERE state = ? AND updated < ?", (STATES.index("marked"), cutoff)
+            ).fetchall()
+            self.db.execute(
+                "DELETE FROM ledger WHERE state = ? AND updated < ?", (STATES.index("marked"), cutoff)
+            )
+            self.db.commit()
+            for (msg_id,) in rows:
+                self.entries.pop(msg_id, None)
+            self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if rows:
+                self.db.execute("VACUUM")
+        logger.info("Compacted ledger: dropped %d entries, %d left", len(rows), len(self.entries))
+        return len(rows)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from gmail_fetch import MAX_BATCH_SIZE, fetch_messages, parse_message
+
+logger = logging.getLogger(__name__)
+
+# How far a message has made it through the pipeline, in order
+STATES = ("fetched", "generated", "sent", "marked")
+
+# Threads per stage. These only cap concurrency: the Gmail stages are paced
+# by the per-user rate limiter in google_api, which every Gmail call goes through
+DEFAULT_WORKERS = {"fetch": 1, "generate": 4, "send": 2, "mark": 2}
+
+# A message whose reply can't be generated this many times in a row (a
+# blocked response, a body the model chokes on) is parked instead of being
+# fetched and paid for again on every poll
+MAX_GENERATE_ATTEMPTS = 3
+
+
+class MemoryLedger:
+    """Remembers how far each message got, so a retry never repeats a step."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, msg_id):
+        with self.lock:
+            return self.entries.get(msg_id)
+
+    def advance(self, msg_id, state, **data):
+        with self.lock:
+            entry = self.entries.setdefault(msg_id, {"state": state})
+            entry.update(data, state=state)
+
+    def reached(self, msg_id, state) -> bool:
+        entry = self.get(msg_id)
+        return entry is not None and STATES.index(entry["state"]) >= STATES.index(state)
+
+    def pending(self):
+        """IDs that were started but never marked read, leaving out parked ones."""
+        with self.lock:
+            return [msg_id for msg_id, entry in self.entries.items()
+                    if entry["state"] != "marked" and not entry.get("parked")]
+
+    def forget(self, msg_id):
+        with self.lock:
+            self.entries.pop(msg_id, None)
+
+
+class ReplyPipeline:
+    """Fetch -> generate -> send -> mark-read, each stage on its own worker pool.
+
+    service_factory/service_release hand out and take back a Gmail client per
+    worker thread. The stage callables come from app.py:
+      generate_reply(message) -> reply text
+      send_reply(service, message, reply_text)
+      mark_read(service, msg_id)
+
+    Every step is recorded in the ledger before moving on, so if a later stage
+    fails the next run picks up where it left off instead of calling the LLM
+    or sending the reply again. A message whose reply fails to generate
+    max_attempts times is parked in the ledger and skipped from then on.
+    user names the mailbox for the Gmail rate limits and metrics.
+    """
+
+    def __init__(self, service_factory, generate_reply, send_reply, mark_read,
+                 ledger=None, workers=None, service_release=None, user: str = "me",
+                 max_attempts: int = MAX_GENERATE_ATTEMPTS):
+        self.service_factory = service_factory
+        self.service_release = service_release
+        self.generate_reply = generate_reply
+        self.send_reply = send_reply
+        self.mark_read = mark_read
+        self.user = user
+        self.max_attempts = max_attempts
+        self.ledger = ledger or MemoryLedger()
+        self.workers = dict(DEFAULT_WORKERS, **(workers or {}))
+        # googleapiclient services are not thread safe, so each worker gets its own
+        self.local = threading.local()
+
+    def _service(self):
+        if not hasattr(self.local, "service"):
+            self.local.service = self.service_factory()
+        return self.local.service
+
+    def _fetch(self, chunk):
+        messages, errors = fetch_messages(self._service(), chunk, user=self.user)
+        for msg_id, error in errors.items():
+            self.results[msg_id] = error
+        parsed = []
+        for msg_id in chunk:
+            if msg_id in messages:
+                if not self.ledger.reached(msg_id, "fetched"):
+                    self.ledger.advance(msg_id, "fetched")
+                parsed.append(parse_message(messages[msg_id]))
+        return parsed
+
+    def _generate(self, message):
+        entry = self.ledger.get(message["id"])
+        if self.ledger.reached(message["id"], "generated"):
+            message["reply"] = entry["reply"]
+            return [message]
+        if not (message["sender"] and message["message_id_header"]):
+            # Nothing to reply to; don't keep it around as unfinished work
+            self.ledger.forget(message["id"])
+            self.results[message["id"]] = "skipped"
+            return []
+        try:
+            message["reply"] = self.generate_reply(message)
+        except Exception:
+            attempts = (entry or {}).get("attempts", 0) + 1
+            parked = attempts >= self.max_attempts
+            self.ledger.advance(message["id"], "fetched", attempts=attempts, parked=parked)
+            if parked:
+                logger.warning("Parking message %s after %d failed replies", message["id"], attempts)
+                metrics.incr("pipeline_parked_total")
+            raise
+        self.ledger.advance(message["id"], "generated", reply=message["reply"])
+        return [message]
+
+    def _send(self, message):
+        if not self.ledger.reached(message["id"], "sent"):
+            self.send_reply(self._service(), message, message["reply"])
+            self.ledger.advance(message["id"], "sent")
+        return [message]
+
+    def _mark(self, message):
+        if not self.ledger.reached(message["id"], "marked"):
+            self.mark_read(self._service(), message["id"])
+            self.ledger.advance(message["id"], "marked")
+        self.results[message["id"]] = "marked"
+        return []
+
+    def _worker(self, name, fn, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is None:
+                if self.service_release and hasattr(self.local, "service"):
+                    self.service_release(self.local.service)
+                    del self.local.service
+                inbox.task_done()
+                return
+            try:
+                with metrics.timer("pipeline_stage_seconds", stage=name):
+                    outputs = fn(item)
+                for out in outputs:
+                    outbox.put(out)
+            except Exception as error:
+                # A chunk of IDs only fails as a whole if the batch call itself broke
+                ids = item if isinstance(item, list) else [item["id"]]
+                for msg_id in ids:
+                    self.results[msg_id] = error
+            finally:
+                inbox.task_done()
+
+    def run(self, msg_ids, chunk_size: int = MAX_BATCH_SIZE):
+        """Push msg_ids through every stage and wait for them to drain.
+
+        Returns {msg_id: "marked" | "skipped" | "parked" | exception}.
+        """
+        self.results = {}
+        stages = [
+            ("fetch", self._fetch),
+            ("generate", self._generate),
+            ("send", self._send),
+            ("mark", self._mark),
+        ]
+        queues = [queue.Queue() for _ in range(len(stages) + 1)]
+        threads = []
+        for i, (name, fn) in enumerate(stages):
+            for _ in range(self.workers[name]):
+                t = threading.Thread(target=self._worker, args=(name, fn, queues[i], queues[i + 1]), daemon=True)
+                t.start()
+                threads.append((i, t))
+
+        msg_ids = list(dict.fromkeys(msg_ids))
+        # Messages the ledger has seen all the way through, or given up on, aren't even fetched
+        for msg_id in msg_ids:
+            if self.ledger.reached(msg_id, "marked"):
+                self.results[msg_id] = "marked"
+            elif (self.ledger.get(msg_id) or {}).get("parked"):
+                self.results[msg_id] = "parked"
+        msg_ids = [msg_id for msg_id in msg_ids if msg_id not in self.results]
+        for i in range(0, len(msg_ids), chunk_size):
+            queues[0].put(msg_ids[i:i + chunk_size])
+
+        # Items are handed to the next queue before task_done(), so once stage
+        # i has joined nothing else can show up in it and its workers can stop
+        for i, (name, _) in enumerate(stages):
+            queues[i].join()
+            for _ in range(self.workers[name]):
+                queues[i].put(None)
+        for _, t in threads:
+            t.join()
+
+        return self.results
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Refresh this long before Gemini drops the cache, so a request never races expiry
+REFRESH_MARGIN = timedelta(minutes=2)
+
+
+class PromptCache:
+    """Keeps static recruiter contexts on Gemini's side between requests.
+
+    Each context (one per job) is uploaded once as cached content and every
+    generate call only sends the candidate's question. If caching is not
+    available (the context is under the model's minimum cache size, the API
+    key has no access, ...) we fall back to a model with the context as its
+    system instruction, which is still built only once per context.
+    """
+
+    def __init__(self, model_name: str, ttl: timedelta = timedelta(hours=1), max_entries: int = 16):
+        self.model_name = model_name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # name -> (context hash, model, cached content or None, expires)
+        self.entries = OrderedDict()
+        # (name, context hash) -> Future of the model, while one caller builds it
+        self.building = {}
+
+    def get_model(self, context: str, name: str = "default"):
+        """Return a GenerativeModel primed with context, refreshing it if needed.
+
+        name identifies the context (e.g. a job ID) so that when its text
+        changes the old cache is replaced rather than kept alongside.
+        """
+        key = hashlib.sha256(context.encode()).hexdigest()
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry and entry[0] == key and datetime.now() < entry[3]:
+                self.entries.move_to_end(name)
+                metrics.incr("prompt_cache_total", result="hit")
+                return entry[1]
+            building = self.building.get((name, key))
+            if building is None:
+                building = self.building[(name, key)] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            # Someone else is creating this cache already; share theirs
+            metrics.incr("prompt_cache_total", result="wait")
+            return building.result()
+        metrics.incr("prompt_cache_total", result="miss")
+
+        # Creating the cache is a network call, so other contexts' hits don't wait on it
+        try:
+            model, cached = self._build(context)
+        except BaseException as error:
+            with self.lock:
+                del self.building[(name, key)]
+            building.set_exception(error)
+            raise
+        expires = datetime.now() + self.ttl - min(REFRESH_MARGIN, self.ttl / 2)
+        stale = []
+        with self.lock:
+            replaced = self.entries.get(name)
+            if replaced:
+                stale.append(replaced[2])
+            self.entries[name] = (key, model, cached, expires)
+            self.entries.move_to_end(name)
+            if len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                stale.append(evicted[2])
+            del self.building[(name, key)]
+        building.set_result(model)
+        for old in stale:
+            self._drop_cached(old)
+        return model
+
+    def _build(self, context):
+        try:
+            cached = caching.CachedContent.create(
+                model=f"models/{self.model_name}",
+                system_instruction=context,
+                ttl=self.ttl,
+            )
+            return genai.GenerativeModel.from_cached_content(cached), cached
+        except Exception as error:
+            logger.warning("Context caching unavailable, sending it as a system instruction: %s", error)
+            return genai.GenerativeModel(self.model_name, system_instruction=context), None
+
+    def _drop_cached(self, cached):
+        # Free the old cache as soon as it is replaced instead of paying for it
+        # until the TTL runs out
+        if cached is not None:
+            try:
+                cached.delete()
+            except Exception as error:
+                logger.warning("Could not delete cached context: %s", error)
@@ -0,0 +1,309 @@
+"""Run the auto-responder for several recruiter mailboxes at once.
+
+Each account has its own token, ledger, sync state and Gmail quota. Accounts
+are sharded across worker processes (one polling thread per account inside
+a shard); the supervisor restarts a shard that dies and serves /health with
+each shard's liveness and each account's lag:
+
+    python supervisor.py --accounts accounts.json --authorize
+    python supervisor.py --accounts accounts.json --processes 4
+
+accounts.json lists the mailboxes; everything but the name is optional:
+
+    [{"name": "jobs", "dir": "accounts/jobs", "quota_per_second": 250, "reply_workers": 4},
+     {"name": "internships"}]
+
+Files default to token.json, ledger.db and sync_state.json in the account's
+dir (accounts/<name>). Shard N serves its /metrics on METRICS_PORT + 1 + N.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import NamedTuple
+
+from googleapiclient.errors import HttpError
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from google_api import DEFAULT_QUOTAS, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
+
+# Seconds between a shard's status reports to the supervisor
+HEARTBEAT_SECONDS = 5
+
+# An account that hasn't finished a poll for this long is reported unhealthy,
+# so a Gmail outage shows up once it has lasted this long
+STALE_AFTER_SECONDS = float(os.getenv("ACCOUNT_STALE_AFTER_SECONDS", "180"))
+
+# Restart delay for a crashed shard doubles up to this; it resets once the shard stays up
+MAX_RESTART_DELAY = 60
+
+
+class Account(NamedTuple):
+    name: str
+    token_file: str
+    ledger_file: str
+    sync_state_file: str
+    credentials_file: str = "credentials.json"
+    quota_per_second: float = DEFAULT_QUOTAS["gmail"]
+    reply_workers: int = 4
+
+
+def load_accounts(path: str):
+    """Read the accounts file, filling in per-account paths under each account's dir."""
+    with open(path) as f:
+        configs = json.load(f)
+    accounts = []
+    for config in configs:
+        name = config["name"]
+        directory = config.get("dir", os.path.join("accounts", name))
+        accounts.append(Account(
+            name=name,
+            token_file=config.get("token_file", os.path.join(directory, "token.json")),
+            ledger_file=config.get("ledger_file", os.path.join(directory, "ledger.db")),
+            sync_state_file=config.get("sync_state_file", os.path.join(directory, "sync_state.json")),
+            credentials_file=config.get("credentials_file", "credentials.json"),
+            quota_per_second=float(config.get("quota_per_second", DEFAULT_QUOTAS["gmail"])),
+            reply_workers=int(config.get("reply_workers", 4)),
+        ))
+    names = [account.name for account in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate account names in {path}")
+    return accounts
+
+
+def serve_account(account: Account, stop, state: dict):
+    """Poll and answer one mailbox until stop is set, keeping state up to date.
+
+    status is "ok" after a poll that worked, "failing" after one that
+    didn't (last_poll then stays put, so the lag grows) and "error" when
+    the account can't be served at all.
+    """
+    # Imported here so the supervisor itself never loads Gemini or the job postings
+    import app
+    from gmail_sync import HistorySync, IdleBackoff
+    from google_services import ServiceManager
+    from ledger import SqliteLedger
+
+    if not os.path.exists(account.token_file):
+        # The OAuth flow needs a browser; it's run up front with --authorize
+        state.update(status="error", error=f"no token at {account.token_file}, run with --authorize")
+        return
+
+    app.gmail.set_rate(account.name, account.quota_per_second)
+    services = ServiceManager("gmail", "v1", app.SCOPES, token_file=account.token_file,
+                              client_secrets_file=account.credentials_file, pool_size=8)
+    pipeline = app.create_pipeline(ledger=SqliteLedger(account.ledger_file), services=services,
+                                   user=account.name, reply_workers=account.reply_workers)
+    pipeline.ledger.compact()
+    sync = HistorySync(account.sync_state_file, user=account.name)
+    backoff = IdleBackoff()
+    try:
+        while not stop.is_set():
+            try:
+                with services.service() as service:
+                    found = app.func(sync, service, pipeline)
+            except (HttpError, CircuitOpenError) as error:
+                # func has logged it already
+                state.update(status="failing", error=str(error))
+                found = 0
+            except Exception as error:
+                logger.exception("Poll for %s failed", account.name)
+                state.update(status="failing", error=str(error))
+                found = 0
+            else:
+                state.update(status="ok", error=None, last_poll=time.time(), handled=state["handled"] + found)
+            state["pending"] = len(sync.pending)
+            stop.wait(backoff.next_delay(found > 0))
+    finally:
+        services.close()
+
+
+def run_shard(index: int, accounts, statuses, stop, metrics_port: int = 0):
+    """Worker process: one thread per account, reporting their state to the supervisor."""
+    # Ctrl-C reaches the whole process group; let the supervisor decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    metrics.setup_logging()
+    if metrics_port:
+        metrics.serve(metrics_port)
+
+    states = {account.name: {"status": "starting", "error": None, "last_poll": None, "handled": 0, "pending": 0}
+              for account in accounts}
+    threads = [threading.Thread(target=serve_account, args=(account, stop, states[account.name]),
+                                name=f"account-{account.name}", daemon=True)
+               for account in accounts]
+    for thread in threads:
+        thread.start()
+    # Don't hold up exit on a report the supervisor will never read
+    statuses.cancel_join_thread()
+    while not stop.wait(HEARTBEAT_SECONDS):
+        statuses.put((index, {name: dict(state) for name, state in states.items()}))
+    for thread in threads:
+        thread.join()
+
+
+class Supervisor:
+    """Starts one process per shard, restarts any that die, and tracks account lag."""
+
+    def __init__(self, accounts, processes: int, metrics_port: int = 0,
+                 stale_after: float = STALE_AFTER_SECONDS):
+        self.context = multiprocessing.get_context("spawn")
+        processes = max(1, min(processes, len(accounts)))
+        self.shards = [accounts[i::processes] for i in range(processes)]
+        self.metrics_port = metrics_port
+        self.stale_after = stale_after
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        # Every start gets its own stop event and queue: a shard killed while
+        # waiting on one or writing to it leaves it unusable for anyone else
+        self.procs = [None] * processes
+        self.shard_stops = [None] * processes
+        self.statuses = [None] * processes
+        self.started = [0.0] * processes
+        self.restarts = [0] * processes
+        self.restart_at = [0.0] * processes
+        self.accounts = {account.name: {"shard": i, "status": "starting", "error": None, "last_poll": None,
+                                        "handled": 0, "pending": 0}
+                         for i, shard in enumerate(self.shards) for account in shard}
+
+    def start_shard(self, index: int):
+        port = self.metrics_port + 1 + index if self.metrics_port else 0
+        self.shard_stops[index] = self.context.Event()
+        self.statuses[index] = self.context.Queue()
+        proc = self.context.Process(target=run_shard, name=f"shard-{index}",
+                                    args=(index, self.shards[index], self.statuses[index],
+                                          self.shard_stops[index], port))
+        proc.start()
+        self.procs[index] = proc
+        self.started[index] = time.time()
+        logger.info("Started shard %d (pid %d) for %s", index, proc.pid,
+                    ", ".join(account.name for account in self.shards[index]))
+
+    def check_shards(self):
+        now = time.time()
+        for index, proc in enumerate(self.procs):
+            if proc is not None and proc.is_alive():
+                if now - self.started[index] > MAX_RESTART_DELAY:
+                    self.restarts[index] = 0
+                metrics.gauge("shard_up", 1, shard=index)
+                continue
+            metrics.gauge("shard_up", 0, shard=index)
+            if proc is not None:
+                delay = min(MAX_RESTART_DELAY, 2 ** self.restarts[index])
+                logger.error("Shard %d exited with code %s, restarting in %ds", index, proc.exitcode, delay)
+                metrics.incr("shard_restarts_total", shard=index)
+                self.restarts[index] += 1
+                self.restart_at[index] = now + delay
+                self.procs[index] = None
+            elif now >= self.restart_at[index]:
+                self.start_shard(index)
+
+    def drain_statuses(self):
+        for statuses in self.statuses:
+            while statuses is not None:
+                try:
+                    index, states = statuses.get_nowait()
+                except queue.Empty:
+                    break
+                with self.lock:
+                    for name, state in states.items():
+                        self.accounts[name].update(state)
+                for name, state in states.items():
+                    metrics.gauge("account_pending", state["pending"], account=name, shard=index)
+
+    def lag(self, name: str, now: float) -> float:
+        """Seconds since the account last finished a poll (or since its shard started)."""
+        account = self.accounts[name]
+        return now - (account["last_poll"] or self.started[account["shard"]] or now)
+
+    def health(self):
+        """(healthy, report) for /health: all shards up, no account unservable or lagging past stale_after."""
+        now = time.time()
+        with self.lock:
+            accounts = {}
+            for name, account in self.accounts.items():
+                lag = self.lag(name, now)
+                accounts[name] = dict(account, lag_seconds=round(lag, 1),
+                                      healthy=account["status"] != "error" and lag <= self.stale_after)
+        shards = [{"shard": i, "up": proc is not None and proc.is_alive(), "restarts": self.restarts[i],
+                   "accounts": [account.name for account in self.shards[i]]}
+                  for i, proc in enumerate(self.procs)]
+        healthy = all(shard["up"] for shard in shards) and all(a["healthy"] for a in accounts.values())
+        return healthy, {"healthy": healthy, "shards": shards, "accounts": accounts}
+
+    def run(self):
+        """Supervise until SIGTERM or Ctrl-C, then stop the shards and wait for them."""
+        def request_stop(*_):
+            self.stop.set()
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        while not self.stop.is_set():
+            self.check_shards()
+            self.drain_statuses()
+            now = time.time()
+            with self.lock:
+                for name, account in self.accounts.items():
+                    metrics.gauge("account_lag_seconds", self.lag(name, now), account=name, shard=account["shard"])
+            time.sleep(1)
+
+        logger.info("Stopping %d shards", len(self.procs))
+        for proc, stop in zip(self.procs, self.shard_stops):
+            if proc is not None and proc.is_alive():
+                stop.set()
+        for proc in self.procs:
+            if proc is not None:
+                proc.join(timeout=30)
+                if proc.is_alive():
+                    proc.terminate()
+
+
+def authorize(accounts):
+    """Run the OAuth consent flow for every account that has no token yet."""
+    from app import SCOPES
+    from google_services import ServiceManager
+
+    for account in accounts:
+        if os.path.exists(account.token_file):
+            continue
+        os.makedirs(os.path.dirname(account.token_file) or ".", exist_ok=True)
+        print(f"Sign in as the {account.name} mailbox")
+        services = ServiceManager("gmail", "v1", SCOPES, token_file=account.token_file,
+                                  client_secrets_file=account.credentials_file)
+        services.credentials  # loading them runs the consent flow and saves the token
+        services.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", default="accounts.json", help="JSON list of mailboxes to serve")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes to shard over")
+    parser.add_argument("--authorize", action="store_true", help="sign in to accounts without a token, then exit")
+    args = parser.parse_args()
+
+    metrics.setup_logging()
+    accounts = load_accounts(args.accounts)
+    if args.authorize:
+        authorize(accounts)
+        return
+    for account in accounts:
+        os.makedirs(os.path.dirname(account.ledger_file) or ".", exist_ok=True)
+        os.makedirs(os.path.dirname(account.sync_state_file) or ".", exist_ok=True)
+
+    supervisor = Supervisor(accounts, args.processes, metrics_port=METRICS_PORT)
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT, health=supervisor.health)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Non-blocking version of bot.py, built on Bolt's AsyncApp and the async genai client.
+
+Each message gets a placeholder reply straight away, which is edited in place
+once Gemini answers, or as it answers with STREAM_RESPONSES=1. Generations
+are capped per channel so one busy channel can't hold every slot.
+
+    python async_bot.py
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from google import genai
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_bolt.async_app import AsyncApp
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from conversation_memory import memory_from_env, thread_key
+from genai_config import GENERATE_CONFIG, MODEL, TOOL_FUNCTIONS
+from slack_streaming import PLACEHOLDER_TEXT, STREAM_RESPONSES, stream_to_slack_async
+from tool_dispatch import ToolDispatcher
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bolt injects its own Slack client as `client`, so Gemini's goes by another name
+genai_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+app = AsyncApp(token=os.getenv("SLACK_BOT_TOKEN"))
+# Wait out Slack's Retry-After on a 429 instead of failing the handler;
+# Bolt copies these onto the client each listener gets
+app.client.retry_handlers.append(AsyncRateLimitErrorRetryHandler(max_retry_count=2))
+
+# Local port for /metrics (Prometheus) and /metrics.json; 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))
+memory = memory_from_env()
+tools = ToolDispatcher(TOOL_FUNCTIONS)
+
+# How many Gemini calls a single channel may have in flight at once
+MAX_CONCURRENT_PER_CHANNEL = int(os.getenv("SLACK_MAX_CONCURRENT_PER_CHANNEL", "2"))
+# Only channels with a message in flight have an entry
+channel_limits = {}
+channel_users = {}
+
+# What the placeholder is replaced with when no answer could be generated
+ERROR_TEXT = "Sorry, something went wrong while answering. Please try again."
+
+
+@asynccontextmanager
+async def channel_slot(channel):
+    """Hold one of the channel's generation slots; its semaphore is dropped once nobody holds or waits for it."""
+    if channel not in channel_limits:
+        channel_limits[channel] = asyncio.Semaphore(MAX_CONCURRENT_PER_CHANNEL)
+        channel_users[channel] = 0
+    channel_users[channel] += 1
+    try:
+        async with channel_limits[channel]:
+            yield
+    finally:
+        channel_users[channel] -= 1
+        if not channel_users[channel]:
+            del channel_limits[channel], channel_users[channel]
+
+
+@app.message("")
+async def handle_message(message, say, client):
+    user_text = message['text']
+    metrics.incr("slack_messages_total")
+    key = thread_key(message)
+    conversation = memory.contents(key, user_text)
+    received = time.perf_counter()
+
+    placeholder = await say(PLACEHOLDER_TEXT)
+    acked = time.perf_counter()
+
+    try:
+        async with channel_slot(message['channel']):
+            started = time.perf_counter()
+            if STREAM_RESPONSES:
+                chunks = await genai_client.aio.models.generate_content_stream(
+                    model=MODEL,
+                    contents=conversation,
+                    config=GENERATE_CONFIG,
+                )
+                reply = await stream_to_slack_async(client, placeholder['channel'], placeholder['ts'], chunks)
+                first_visible = reply.first_token or time.perf_counter()
+                answer = reply.text
+                if reply.function_calls:
+                    # The model wants tools run; finish the exchange without streaming
+                    response = await tools.run_async(genai_client, MODEL, conversation, GENERATE_CONFIG,
+                                                     calls=reply.function_calls)
+                    answer = "\n\n".join(t for t in (reply.text, response.text) if t)
+            else:
+                # Runs any tool calls the model makes and returns its final answer
+                response = await tools.run_async(genai_client, MODEL, conversation, GENERATE_CONFIG)
+                answer = response.text
+            generated = time.perf_counter()
+    except Exception:
+        # Don't leave "Thinking..." up forever; Bolt logs the error itself
+        metrics.incr("slack_reply_errors_total")
+        try:
+            await client.chat_update(channel=placeholder['channel'], ts=placeholder['ts'], text=ERROR_TEXT)
+        except SlackApiError as error:
+            logger.warning("Could not replace the placeholder in %s: %s", placeholder['channel'], error)
+        raise
+
+    if not STREAM_RESPONSES:
+        await client.chat_update(channel=placeholder['channel'], ts=placeholder['ts'], text=answer)
+        first_visible = time.perf_counter()
+    elif answer != reply.text:
+        await client.chat_update(channel=placeholder['channel'], ts=placeholder['ts'], text=answer)
+    memory.add(key, "user", user_text)
+    memory.add(key, "model", answer)
+    done = time.perf_counter()
+    metrics.observe("slack_first_visible_seconds", first_visible - received)
+    metrics.observe("slack_reply_seconds", done - received)
+
+    logger.info(
+        "channel=%s ack=%.0fms queued=%.0fms generate=%.0fms update=%.0fms first_visible=%.0fms total=%.0fms",
+        message['channel'],
+        (acked - received) * 1000,
+        (started - acked) * 1000,
+        (generated - started) * 1000,
+        (done - generated) * 1000,
+        (first_visible - received) * 1000,
+        (done - received) * 1000,
+    )
+
+
+async def main():
+    await AsyncSocketModeHandler(app, os.getenv("SLACK_APP_TOKEN")).start_async()
+
+
+if __name__ == "__main__":
+    metrics.setup_logging()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    asyncio.run(main())
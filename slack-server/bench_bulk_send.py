@@ -0,0 +1,63 @@
+"""Compare sending invites one call at a time against send_bulk_invites.
+
+Uses FakeTransport, so no Gmail credentials are needed:
+
+    python bench_bulk_send.py --recipients 40 --latency 0.3 --rate 10 --error-rate 0.1
+"""
+import argparse
+import time
+
+from bulk_sender import send_bulk_invites
+import common_path  # noqa: F401  (puts common/ on sys.path)
+from fake_transport import FakeTransport
+from gmail_sender import build_invite
+from google_api import QUOTA_UNITS, GoogleApi
+
+
+def shortlist(n):
+    return [(f"candidate{i}@example.com", f"Candidate {i}", "We'd love to chat about the role.") for i in range(n)]
+
+
+def one_by_one(records, transport):
+    """The old way: one send per call, one after another, no retries."""
+    sent = 0
+    for applicant_email, applicant_name, content in records:
+        try:
+            transport(build_invite(content, applicant_email, applicant_name))
+            sent += 1
+        except Exception as e:
+            print(f"An error occurred: {e}")
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per fake send")
+    parser.add_argument("--rate", type=float, default=10, help="sends per second allowed")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    records = shortlist(args.recipients)
+
+    transport = FakeTransport(args.latency, args.error_rate, seed=1)
+    start = time.perf_counter()
+    sent = one_by_one(records, transport)
+    sequential = time.perf_counter() - start
+    print(f"one by one: {sent}/{len(records)} sent in {sequential:.2f}s")
+
+    transport = FakeTransport(args.latency, args.error_rate, seed=1)
+    start = time.perf_counter()
+    # A quota of --rate sends a second
+    gmail = GoogleApi("gmail", args.rate * QUOTA_UNITS["messages.send"], base_delay=0.1)
+    reports = send_bulk_invites(records, transport=transport, api=gmail, workers=args.workers)
+    bulk = time.perf_counter() - start
+    sent = sum(r['status'] == 'sent' for r in reports)
+    print(f"bulk:       {sent}/{len(records)} sent in {bulk:.2f}s "
+          f"({transport.calls} calls, peak {transport.peak_rate()}/s, {transport.max_in_flight} in flight)")
+    print(f"speedup: {sequential / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Load test both bots' handle_message against fake Slack, Gemini and Gmail clients.
+
+No network or credentials needed. Messages arrive in bursts spread over a
+few channels and threads; bot.py's handler runs on a thread pool the size of
+Bolt's, async_bot.py's handles each burst concurrently. A share of messages
+make the model call send_schedule_interview_email, which sends through
+FakeTransport. Reports throughput and p50/p99 per entry point:
+
+    python bench_load.py --bursts 10 --burst-size 20 --llm-latency 0.8 --tool-rate 0.2
+    python bench_load.py --stream --error-rate 0.05 --save base.json
+    python bench_load.py --stream --error-rate 0.05 --baseline base.json
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import sys
+
+os.environ.setdefault("GEMINI_API_KEY", "fake")
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-fake")
+os.environ["SLACK_TOKEN_VERIFICATION"] = "0"
+os.environ["METRICS_PORT"] = "0"
+os.environ.pop("CONVERSATION_DB", None)
+
+import async_bot  # noqa: E402  (the settings above are read on import)
+import bot  # noqa: E402
+import common_path  # noqa: E402,F401  (puts common/ on sys.path)
+import gmail_sender  # noqa: E402
+import loadtest  # noqa: E402
+from conversation_memory import ConversationMemory  # noqa: E402
+from fake_genai import FakeGenaiClient, load_answers  # noqa: E402
+from fake_slack import FakeAsyncSlackClient, FakeSlackClient  # noqa: E402
+from fake_transport import FakeTransport  # noqa: E402
+from genai_config import TOOL_FUNCTIONS  # noqa: E402
+from tool_dispatch import ToolDispatcher  # noqa: E402
+
+# Bolt's default thread pool for listeners
+BOLT_WORKERS = 10
+
+MESSAGES = [
+    "Who are the best applicants for the frontend internship?",
+    "Can you invite Jane Doe to an interview next week?",
+    "Find candidates with react and typescript experience",
+    "When is everyone on the hiring panel free on Friday?",
+    "Summarize the last three applicants for the data role",
+]
+
+
+def message_bursts(bursts, size, channels, threads, rng):
+    """Slack message events, burst by burst, spread over channels and threads."""
+    n = 0
+    for _ in range(bursts):
+        burst = []
+        for _ in range(size):
+            channel = f"C{rng.randrange(channels):04d}"
+            burst.append({"text": rng.choice(MESSAGES), "channel": channel, "user": f"U{n:05d}",
+                          "ts": f"1700000000.{n:06d}", "thread_ts": f"1700000000.{rng.randrange(threads):06d}"})
+            n += 1
+        yield burst
+
+
+def tool_call(rng):
+    i = rng.randrange(10000)
+    return {"name": "send_schedule_interview_email", "args": {
+        "message_content": "We'd love to talk to you about the internship. Pick a time here: https://cal.example.com",
+        "applicant_email": f"candidate{i}@example.com",
+        "applicant_name": f"Candidate {i}",
+    }}
+
+
+def instrumented_tools(recorder):
+    return {name: recorder.timed(name, fn) for name, fn in TOOL_FUNCTIONS.items()}
+
+
+def run_sync(recorder, bursts, slack, workers):
+    def handle(message):
+        try:
+            with recorder.time("handle_message"):
+                bot.handle_message(message, slack.sayer(message["channel"]), slack)
+        except Exception:
+            pass
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        for burst in bursts:
+            with recorder.phase("handle_message", "send_schedule_interview_email"):
+                list(pool.map(handle, burst))
+
+
+async def run_async(recorder, bursts, slack):
+    async def handle(message):
+        try:
+            with recorder.time("handle_message_async"):
+                await async_bot.handle_message(message, slack.sayer(message["channel"]), slack)
+        except Exception:
+            pass
+
+    for burst in bursts:
+        with recorder.phase("handle_message_async", "send_schedule_interview_email"):
+            await asyncio.gather(*(handle(message) for message in burst))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--burst-size", type=int, default=20)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=10, help="threads per channel the messages land in")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per Gemini call")
+    parser.add_argument("--slack-latency", type=float, default=0.05, help="seconds per Slack API call")
+    parser.add_argument("--gmail-latency", type=float, default=0.1, help="seconds per Gmail send")
+    parser.add_argument("--tool-rate", type=float, default=0.2, help="share of messages that send an invite")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of Gemini/Slack/Gmail calls that fail")
+    parser.add_argument("--stream", action="store_true", help="stream answers into Slack (STREAM_RESPONSES=1)")
+    parser.add_argument("--answers", help="replay recorded answers (a JSON list of strings)")
+    parser.add_argument("--only", choices=("sync", "async"), help="run only one of the bots")
+    parser.add_argument("--seed", type=int, default=7)
+    loadtest.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Failures are expected with --error-rate; the report counts them
+    logging.basicConfig(level=logging.CRITICAL)
+    rng = random.Random(args.seed)
+    answers = load_answers(args.answers) if args.answers else None
+    recorder = loadtest.Recorder()
+    transport = FakeTransport(args.gmail_latency, args.error_rate, error_status=500, seed=args.seed)
+    gmail_sender.gmail_transport = transport
+    genai_clients = []
+
+    for module, name in ((bot, "sync"), (async_bot, "async")):
+        if args.only and args.only != name:
+            continue
+        client = FakeGenaiClient(args.llm_latency, args.error_rate, answers, tool_calls=[tool_call(rng)],
+                                 tool_rate=args.tool_rate, seed=args.seed)
+        genai_clients.append(client)
+        module.genai_client = client
+        module.tools = ToolDispatcher(instrumented_tools(recorder))
+        module.memory = ConversationMemory()
+        module.STREAM_RESPONSES = args.stream
+        bursts = message_bursts(args.bursts, args.burst_size, args.channels, args.threads, random.Random(args.seed))
+        if name == "sync":
+            slack = FakeSlackClient(args.slack_latency, args.error_rate, args.seed)
+            run_sync(recorder, bursts, slack, BOLT_WORKERS)
+        else:
+            slack = FakeAsyncSlackClient(args.slack_latency, args.error_rate, args.seed)
+            asyncio.run(run_async(recorder, bursts, slack))
+
+    print(f"messages={args.bursts * args.burst_size} per bot, llm_latency={args.llm_latency}s "
+          f"slack_latency={args.slack_latency}s error_rate={args.error_rate} stream={args.stream} "
+          f"llm_calls={sum(c.calls for c in genai_clients)} invites_sent={len(transport.sent)}\n")
+    sys.exit(loadtest.finish(args, recorder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Rank synthetic applicants against job postings, vectorized vs pair by pair.
+
+No Supabase or resume files needed:
+
+    python bench_match_scoring.py --applicants 10000 --jobs 20 --k 10
+"""
+import argparse
+import math
+import random
+import time
+
+from match_scoring import MatchScorer, job_term_counts
+
+SKILLS = [
+    "python", "react", "typescript", "next.js", "figma", "sql", "postgres", "kubernetes", "docker", "aws",
+    "c++", "java", "go", "rust", "graphql", "node.js", "tensorflow", "pytorch", "spark", "terraform",
+    "design", "research", "prototyping", "accessibility", "testing", "mentoring", "leadership", "analytics",
+]
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def synthetic(applicants, jobs, rng):
+    counts = []
+    for _ in range(applicants):
+        c = {}
+        for term in rng.sample(SKILLS, 6) + rng.sample(WORDS, 150):
+            c[term] = rng.randint(1, 5)
+        counts.append(c)
+    postings = []
+    for j in range(jobs):
+        postings.append({
+            "id": f"job-{j}",
+            "title": " ".join(rng.sample(SKILLS, 2)) + " engineer",
+            "description": " ".join(rng.sample(WORDS, 40)),
+            "requirements": [" ".join(rng.sample(SKILLS, 2)) for _ in range(5)],
+            "responsibilities": [" ".join(rng.sample(WORDS, 6)) for _ in range(5)],
+        })
+    return counts, postings
+
+
+def pairwise(scorer, counts, jobs, k):
+    """One cosine per (applicant, job) with dicts, like scoring candidates one at a time."""
+    n = len(counts)
+    df = {}
+    for c in counts:
+        for term in c:
+            df[term] = df.get(term, 0) + 1
+
+    def vector(c):
+        v = {t: (1 + math.log(tf)) * (math.log((1 + n) / (1 + df[t])) + 1) for t, tf in c.items() if t in df}
+        norm = math.sqrt(sum(x * x for x in v.values())) or 1
+        return {t: x / norm for t, x in v.items()}
+
+    applicant_vectors = [vector(c) for c in counts]
+    shortlists = {}
+    for job in jobs:
+        jv = vector(job_term_counts(job))
+        scores = [(sum(av.get(t, 0) * x for t, x in jv.items()), i) for i, av in enumerate(applicant_vectors)]
+        shortlists[job["id"]] = sorted(scores, reverse=True)[:k]
+    return shortlists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applicants", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    counts, jobs = synthetic(args.applicants, args.jobs, rng)
+    ids = [str(i) for i in range(args.applicants)]
+
+    scorer = MatchScorer()
+    start = time.perf_counter()
+    scorer.load_applicants(ids, counts)
+    print(f"build matrix:   {time.perf_counter() - start:.2f}s ({scorer.matrix.nnz} nonzeros)")
+
+    start = time.perf_counter()
+    vectorized = scorer.shortlists(jobs, args.k)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    scorer.shortlists(jobs, args.k)
+    cached = time.perf_counter() - start
+    print(f"vectorized:     {first * 1000:.0f}ms, {cached * 1000:.0f}ms with cached job vectors")
+
+    start = time.perf_counter()
+    slow = pairwise(scorer, counts, jobs, args.k)
+    naive = time.perf_counter() - start
+    print(f"pair by pair:   {naive:.2f}s")
+
+    agree = sum(vectorized[j["id"]][0][0] == str(slow[j["id"]][0][1]) for j in jobs)
+    print(f"same top pick for {agree}/{len(jobs)} jobs, speedup {naive / first:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare parsing every resume per question against querying the resume index.
+
+Synthetic DOCX resumes are served from FakeResumeStore, no Supabase needed:
+
+    python bench_resume_index.py --applicants 300 --latency 0.005 --queries 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fake_resume_store import FakeResumeStore, make_docx
+from resume_index import ResumeIndex
+from resume_ingest import ingest, term_counts
+
+SKILLS = [
+    "python", "react", "typescript", "next.js", "figma", "sql", "postgres", "kubernetes", "docker", "aws",
+    "c++", "java", "go", "rust", "graphql", "node.js", "tensorflow", "pytorch", "spark", "terraform",
+]
+FILLER = "Worked with a great team on projects that shipped to many customers across several regions".split()
+
+
+def synthetic_resumes(n, rng):
+    applicants = []
+    store = FakeResumeStore()
+    for i in range(n):
+        lines = [f"Candidate {i}"]
+        for _ in range(40):
+            words = rng.sample(FILLER, 8) + rng.sample(SKILLS, 2)
+            rng.shuffle(words)
+            lines.append(" ".join(words))
+        url = f"resumes/{i}.docx"
+        store.add(url, make_docx("\n".join(lines)))
+        applicants.append({"applicant_id": str(i), "job_id": "job", "name": f"Candidate {i}", "resume_url": url,
+                           "applied_at": f"2025-10-{1 + i % 28:02d}T00:00:00+00:00"})
+    return applicants, store
+
+
+def on_demand(applicants, store, query):
+    """Download and parse every resume, then count query terms."""
+    terms = set(query.lower().split())
+    scores = {}
+    for applicant in applicants:
+        with store.open(applicant["resume_url"]) as fileobj:
+            counts = term_counts(fileobj, applicant["resume_url"])
+        scores[applicant["applicant_id"]] = sum(counts[t] for t in terms)
+    return sorted(scores, key=scores.get, reverse=True)[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applicants", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per fake download")
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    applicants, store = synthetic_resumes(args.applicants, rng)
+    queries = [" ".join(rng.sample(SKILLS, 2)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    on_demand(applicants, store, queries[0])
+    per_query = time.perf_counter() - start
+    print(f"on demand: {per_query * 1000:.0f}ms per query")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ResumeIndex(os.path.join(tmp, "resume_index.db"))
+        start = time.perf_counter()
+        ingest(index, store, applicants)
+        print(f"ingest:    {time.perf_counter() - start:.2f}s for {len(applicants)} resumes (once)")
+
+        start = time.perf_counter()
+        again = ingest(index, store, applicants)
+        print(f"re-ingest: {again} added in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        indexed = (time.perf_counter() - start) / len(queries)
+        print(f"indexed:   {indexed * 1000:.2f}ms per query")
+        print(f"speedup: {per_query / indexed:.0f}x")
+        index.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,74 @@
 import os
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
 from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 
-from gmail_sender import send_email_declaration
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from conversation_memory import memory_from_env, thread_key
+from genai_config import GENERATE_CONFIG, MODEL, TOOL_FUNCTIONS
+from slack_streaming import PLACEHOLDER_TEXT, STREAM_RESPONSES, stream_to_slack
+from tool_dispatch import ToolDispatcher
 
 load_dotenv()
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-app = App(token=os.getenv("SLACK_BOT_TOKEN"))
+# Bolt injects its own Slack client as `client`, so Gemini's goes by another name
+genai_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# SLACK_TOKEN_VERIFICATION=0 skips the auth.test call at startup, for offline runs
+app = App(
+    token=os.getenv("SLACK_BOT_TOKEN"),
+    token_verification_enabled=os.getenv("SLACK_TOKEN_VERIFICATION", "1") == "1",
+)
+# Wait out Slack's Retry-After on a 429 instead of failing the handler;
+# Bolt copies these onto the client each listener gets
+app.client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=2))
 
-SYSTEM_PROMPT = "You are a helpful assistant that answers Slack messages clearly and concisely."
+# Local port for /metrics (Prometheus) and /metrics.json; 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))
+memory = memory_from_env()
+tools = ToolDispatcher(TOOL_FUNCTIONS)
 
 
 @app.message("")
-def handle_message(message, say):
+def handle_message(message, say, client):
     user_text = message['text']
+    metrics.incr("slack_messages_total")
 
-    conversation = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_text}
-    ]
+    # Earlier turns of this thread, plus the new message
+    key = thread_key(message)
+    conversation = memory.contents(key, user_text)
 
-    tools = types.Tool(function_declarations=[send_email_declaration])
-    config = types.GenerateContentConfig(tools=[tools])
+    if STREAM_RESPONSES:
+        # Show the answer as it is generated instead of after the whole thing
+        placeholder = say(PLACEHOLDER_TEXT)
+        chunks = genai_client.models.generate_content_stream(
+            model=MODEL,
+            contents=conversation,
+            config=GENERATE_CONFIG,
+        )
+        reply = stream_to_slack(client, placeholder['channel'], placeholder['ts'], chunks)
+        answer = reply.text
+        if reply.function_calls:
+            # The model wants tools run; finish the exchange without streaming
+            response = tools.run(genai_client, MODEL, conversation, GENERATE_CONFIG, calls=reply.function_calls)
+            answer = "\n\n".join(t for t in (reply.text, response.text) if t)
+            client.chat_update(channel=placeholder['channel'], ts=placeholder['ts'], text=answer)
+        memory.add(key, "user", user_text)
+        memory.add(key, "model", answer)
+        return
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=user_text,
-        config=config,
-    )
+    # Runs any tool calls the model makes and returns its final answer
+    response = tools.run(genai_client, MODEL, conversation, GENERATE_CONFIG)
     
     say(response.text)
+    memory.add(key, "user", user_text)
+    memory.add(key, "model", response.text)
 
 
 if __name__ == "__main__":
+    metrics.setup_logging()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
     SocketModeHandler(app, os.getenv("SLACK_APP_TOKEN")).start()
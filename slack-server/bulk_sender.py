@@ -0,0 +1,95 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+from gmail_sender import SUBJECT_TEMPLATE, build_invite, send_message
+
+logger = logging.getLogger(__name__)
+
+SEND_WORKERS = int(os.getenv("GMAIL_SEND_WORKERS", "4"))
+
+# Body used when the caller doesn't pass one: just the per-candidate content
+BODY_TEMPLATE = "$message_content"
+
+
+class _TransportCall:
+    """One transport(invite) call, shaped like a googleapiclient request for GoogleApi.execute."""
+
+    def __init__(self, transport, invite):
+        self.transport = transport
+        self.invite = invite
+
+    def execute(self):
+        return self.transport(self.invite)
+
+
+def render_invites(records, body_template: str = BODY_TEMPLATE, subject_template: str = SUBJECT_TEMPLATE):
+    """(email, name, content) records -> Gmail send bodies, rendered from the templates.
+
+    Templates use string.Template placeholders: $applicant_name,
+    $applicant_email and $message_content.
+    """
+    body = Template(body_template)
+    invites = []
+    for applicant_email, applicant_name, message_content in records:
+        content = body.safe_substitute(
+            applicant_name=applicant_name,
+            applicant_email=applicant_email,
+            message_content=message_content,
+        )
+        invites.append(build_invite(content, applicant_email, applicant_name, subject_template))
+    return invites
+
+
+def send_bulk_invites(records, body_template: str = BODY_TEMPLATE, subject_template: str = SUBJECT_TEMPLATE,
+                      transport=None, api: google_api.GoogleApi = None, user: str = "me",
+                      workers: int = SEND_WORKERS, max_attempts: int = 4):
+    """Invite a whole shortlist in one call.
+
+    Every record is rendered up front, then sent by a pool of `workers`
+    threads. Each send goes through the shared Gmail GoogleApi (api), so
+    however many workers there are it is priced against the user's quota,
+    slows down when Gmail throttles and stops when the circuit is open.
+    Throttled sends are retried up to max_attempts times with the layer's
+    backoff; anything else fails at once, since the invite may have gone
+    out. transport(body) does the actual send; it defaults to the Gmail API.
+
+    Returns one report per record, in input order:
+    {'email', 'name', 'status': 'sent'|'failed', 'attempts', 'id', 'error'}.
+    """
+    transport = transport or send_message
+    api = api or google_api.api("gmail")
+    invites = render_invites(records, body_template, subject_template)
+
+    def send(record, invite):
+        applicant_email, applicant_name, _ = record
+        report = {'email': applicant_email, 'name': applicant_name, 'status': 'failed',
+                  'attempts': 0, 'id': None, 'error': None}
+        for attempt in range(max_attempts):
+            report['attempts'] = attempt + 1
+            try:
+                # One attempt at a time through the layer; the retries (and reports) are ours
+                result = api.execute(_TransportCall(transport, invite), "messages.send", user=user, max_attempts=1)
+            except Exception as e:
+                report['error'] = str(e)
+                if not google_api.can_retry(e, "messages.send") or attempt == max_attempts - 1:
+                    break
+                metrics.incr("gmail_send_retries_total")
+                api.wait_before_retry(attempt, e)
+                continue
+            report.update(status='sent', id=(result or {}).get('id'), error=None)
+            break
+        return report
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="invite") as pool:
+        reports = list(pool.map(send, records, invites))
+
+    sent = sum(r['status'] == 'sent' for r in reports)
+    metrics.incr("invites_total", sent, result="sent")
+    metrics.incr("invites_total", len(reports) - sent, result="failed")
+    logger.info("Sent %d/%d invites", sent, len(reports))
+    return reports
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Rough Gemini tokenization for English: about four characters per token
+CHARS_PER_TOKEN = 4
+
+# Longest piece of a dropped message that is kept in the thread summary
+SUMMARY_SNIPPET_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def thread_key(message) -> str:
+    """Threads are keyed by channel and thread_ts; a DM without threads is one conversation."""
+    return f"{message['channel']}:{message.get('thread_ts', '')}"
+
+
+class Thread:
+    """One conversation: recent turns verbatim plus a short note about older ones."""
+
+    __slots__ = ("turns", "summary", "tokens")
+
+    def __init__(self, turns=None, summary=""):
+        # (role, text) in order; role is "user" or "model" like genai expects
+        self.turns = list(turns or [])
+        self.summary = summary
+        self.tokens = estimate_tokens(summary) + sum(estimate_tokens(t) for _, t in self.turns)
+
+
+class ConversationMemory:
+    """Per-thread chat history for the Slack bot, bounded in threads and tokens.
+
+    At most max_threads conversations are held in memory, least recently
+    used first out. Each thread is kept under token_budget: once it goes
+    over, the oldest turns are dropped and a one-line snippet of each is
+    folded into the thread's summary, which is itself cut to a quarter of
+    the budget. With db_path set, turns and summaries are also written to
+    SQLite so a restart (or an evicted thread) picks up where it left off.
+    """
+
+    def __init__(self, max_threads: int = 500, token_budget: int = 4000, db_path: str = None):
+        self.max_threads = max_threads
+        self.token_budget = token_budget
+        self.threads = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "thread TEXT, seq INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT, text TEXT)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS turns_thread ON turns (thread, seq)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS summaries (thread TEXT PRIMARY KEY, summary TEXT)")
+            self.db.commit()
+
+    def _load(self, key) -> Thread:
+        if self.db is None:
+            return Thread()
+        rows = self.db.execute("SELECT role, text FROM turns WHERE thread = ? ORDER BY seq", (key,)).fetchall()
+        summary = self.db.execute("SELECT summary FROM summaries WHERE thread = ?", (key,)).fetchone()
+        return Thread(rows, summary[0] if summary else "")
+
+    def _get(self, key) -> Thread:
+        thread = self.threads.get(key)
+        if thread is None:
+            thread = self._load(key)
+            self.threads[key] = thread
+            while len(self.threads) > self.max_threads:
+                self.threads.popitem(last=False)
+        else:
+            self.threads.move_to_end(key)
+        return thread
+
+    def _trim(self, key, thread: Thread):
+        dropped = 0
+        # Always keep the newest turn, however long
+        while thread.tokens > self.token_budget and len(thread.turns) > 1:
+            role, text = thread.turns.pop(0)
+            dropped += 1
+            snippet = " ".join(text.split())[:SUMMARY_SNIPPET_CHARS]
+            who = "User" if role == "user" else "You"
+            thread.summary = f"{thread.summary}\n{who}: {snippet}".strip()
+            thread.tokens -= estimate_tokens(text)
+        if not dropped:
+            return
+
+        summary_limit = self.token_budget // 4 * CHARS_PER_TOKEN
+        if len(thread.summary) > summary_limit:
+            # Drop whole lines from the front so the newest context survives
+            lines = thread.summary.split("\n")
+            while len(lines) > 1 and len("\n".join(lines)) > summary_limit:
+                lines.pop(0)
+            thread.summary = "\n".join(lines)[-summary_limit:]
+        thread.tokens = estimate_tokens(thread.summary) + sum(estimate_tokens(t) for _, t in thread.turns)
+
+        if self.db is not None:
+            self.db.execute(
+                "DELETE FROM turns WHERE seq IN (SELECT seq FROM turns WHERE thread = ? ORDER BY seq LIMIT ?)",
+                (key, dropped),
+            )
+            self.db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, thread.summary))
+
+    def add(self, key, role: str, text: str):
+        """Record a turn and trim the thread back under its budget."""
+        if not text:
+            return
+        with self.lock:
+            thread = self._get(key)
+            thread.turns.append((role, text))
+            thread.tokens += estimate_tokens(text)
+            if self.db is not None:
+                self.db.execute("INSERT INTO turns (thread, role, text) VALUES (?, ?, ?)", (key, role, text))
+            self._trim(key, thread)
+            if self.db is not None:
+                self.db.commit()
+
+    def contents(self, key, user_text: str):
+        """Thread history plus the new message, as genai `contents`."""
+        with self.lock:
+            thread = self._get(key)
+            turns = list(thread.turns)
+            summary = thread.summary
+        contents = []
+        if summary:
+            contents.append({"role": "user", "parts": [{"text": f"Earlier in this conversation:\n{summary}"}]})
+            contents.append({"role": "model", "parts": [{"text": "Got it."}]})
+        for role, text in turns:
+            contents.append({"role": role, "parts": [{"text": text}]})
+        contents.append({"role": "user", "parts": [{"text": user_text}]})
+        return contents
+
+    def forget(self, key):
+        with self.lock:
+            self.threads.pop(key, None)
+            if self.db is not None:
+                self.db.execute("DELETE FROM turns WHERE thread = ?", (key,))
+                self.db.execute("DELETE FROM summaries WHERE thread = ?", (key,))
+                self.db.commit()
+
+
+def memory_from_env() -> ConversationMemory:
+    """ConversationMemory configured from CONVERSATION_* env vars."""
+    return ConversationMemory(
+        max_threads=int(os.getenv("CONVERSATION_MAX_THREADS", "500")),
+        token_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", "4000")),
+        db_path=os.getenv("CONVERSATION_DB") or None,
+    )
@@ -0,0 +1,152 @@
+"""Offline stand-in for google.genai.Client, for benchmarks and load tests.
+
+Answers generate_content() and generate_content_stream(), sync and under
+.aio, with real google.genai response types, so the bots, the streaming
+helpers and ToolDispatcher run unchanged against it. A share of first turns
+can ask for tool calls instead of answering, to load the tool path too.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+from google.genai import errors, types
+
+DEFAULT_ANSWERS = [
+    "Here are the strongest applicants for the frontend role: Jane Doe, Sam Lee and Priya Patel.",
+    "I've sent the interview invitation. They'll get a link to pick a time this week.",
+    "Nobody on the panel is free on Friday afternoon; the earliest common slot is Monday at 10 AM.",
+]
+
+CHARS_PER_TOKEN = 4
+
+
+def load_answers(path: str):
+    """Recorded answers, a JSON list of strings."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _response(text=None, function_calls=(), prompt_chars=0):
+    parts = [types.Part(function_call=call) for call in function_calls]
+    if text:
+        parts.append(types.Part(text=text))
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_chars // CHARS_PER_TOKEN,
+            candidates_token_count=len(text or "") // CHARS_PER_TOKEN,
+        ),
+    )
+
+
+def _is_tool_result(contents):
+    last = contents[-1] if contents else None
+    parts = getattr(last, "parts", None) or []
+    return any(part.function_response for part in parts)
+
+
+class FakeGenaiClient:
+    """A genai.Client whose calls sleep instead of reaching Gemini.
+
+    Each call takes `latency` seconds (spread over the chunks when
+    streaming); a share `error_rate` raise the 429 ClientError the real
+    client raises when over quota. With tool_calls set, a share
+    `tool_rate` of first turns return those function calls rather than
+    text. Answers cycle in order and randomness comes from `seed`, so runs
+    replay exactly.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, answers=None, chunks: int = 5,
+                 tool_calls=None, tool_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.answers = answers or DEFAULT_ANSWERS
+        self.chunks = chunks
+        self.tool_calls = [types.FunctionCall(**call) if isinstance(call, dict) else call
+                           for call in tool_calls or []]
+        self.tool_rate = tool_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.models = _Models(self)
+        self.aio = _Aio(self)
+
+    def _plan(self, contents):
+        """Pick the answer for one call: (text, function calls, fail, prompt size)."""
+        with self.lock:
+            text = self.answers[self.calls % len(self.answers)]
+            self.calls += 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            use_tools = self.tool_calls and not _is_tool_result(contents) and self.random.random() < self.tool_rate
+        prompt_chars = len(str(contents))
+        if use_tools:
+            return None, self.tool_calls, fail, prompt_chars
+        return text, (), fail, prompt_chars
+
+    def _pieces(self, text, calls, prompt_chars):
+        if calls:
+            return [_response(function_calls=calls, prompt_chars=prompt_chars)]
+        size = max(1, -(-len(text) // self.chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        return [_response(piece, prompt_chars=prompt_chars if i == len(pieces) - 1 else 0)
+                for i, piece in enumerate(pieces)]
+
+
+def _quota_error():
+    return errors.ClientError(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                              "status": "RESOURCE_EXHAUSTED"}})
+
+
+class _Models:
+    def __init__(self, client):
+        self.client = client
+
+    def generate_content(self, model, contents, config=None):
+        text, calls, fail, prompt_chars = self.client._plan(contents)
+        time.sleep(self.client.latency)
+        if fail:
+            raise _quota_error()
+        return _response(text, calls, prompt_chars)
+
+    def generate_content_stream(self, model, contents, config=None):
+        text, calls, fail, prompt_chars = self.client._plan(contents)
+        pieces = self.client._pieces(text, calls, prompt_chars)
+        for piece in pieces:
+            time.sleep(self.client.latency / len(pieces))
+            if fail:
+                raise _quota_error()
+            yield piece
+
+
+class _AsyncModels:
+    def __init__(self, client):
+        self.client = client
+
+    async def generate_content(self, model, contents, config=None):
+        text, calls, fail, prompt_chars = self.client._plan(contents)
+        await asyncio.sleep(self.client.latency)
+        if fail:
+            raise _quota_error()
+        return _response(text, calls, prompt_chars)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        # Like the real client: awaiting the call gives an async iterator
+        text, calls, fail, prompt_chars = self.client._plan(contents)
+        return self._stream(self.client._pieces(text, calls, prompt_chars), fail)
+
+    async def _stream(self, pieces, fail):
+        for piece in pieces:
+            await asyncio.sleep(self.client.latency / len(pieces))
+            if fail:
+                raise _quota_error()
+            yield piece
+
+
+class _Aio:
+    def __init__(self, client):
+        self.models = _AsyncModels(client)
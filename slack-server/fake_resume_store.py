@@ -0,0 +1,42 @@
+import io
+import time
+import zipfile
+from collections import Counter
+from xml.sax.saxutils import escape
+
+DOCX_DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>{}</w:body></w:document>'
+)
+
+
+def make_docx(text: str) -> bytes:
+    """A minimal DOCX with one paragraph per line of text."""
+    paragraphs = "".join(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in text.splitlines())
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as docx:
+        docx.writestr("word/document.xml", DOCX_DOCUMENT.format(paragraphs))
+    return buf.getvalue()
+
+
+class FakeResumeStore:
+    """In-memory stand-in for the resume bucket: {resume_url: bytes}.
+
+    Each open() sleeps `latency` seconds, like a download would, and is
+    counted in opens so tests can check nothing was fetched twice.
+    """
+
+    def __init__(self, files=None, latency: float = 0.0):
+        self.files = dict(files or {})
+        self.latency = latency
+        self.opens = Counter()
+
+    def add(self, resume_url: str, data: bytes):
+        self.files[resume_url] = data
+
+    def open(self, resume_url: str):
+        self.opens[resume_url] += 1
+        time.sleep(self.latency)
+        if resume_url not in self.files:
+            raise FileNotFoundError(resume_url)
+        return io.BytesIO(self.files[resume_url])
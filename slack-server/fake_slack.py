@@ -0,0 +1,82 @@
+"""Offline stand-ins for the Slack client and say() that Bolt hands to handlers.
+
+FakeSlackClient is for bot.py, FakeAsyncSlackClient for async_bot.py. Posts
+and edits are kept per channel so a run can be checked afterwards.
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+
+from slack_sdk.errors import SlackApiError
+
+
+class FakeSlackClient:
+    """Sleeps `latency` per Web API call; a share `error_rate` fail as rate limited."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.messages = {}
+        self.calls = 0
+        self.updates = 0
+        self.errors = 0
+        self._ts = itertools.count(1)
+
+    def _begin(self, method):
+        with self.lock:
+            self.calls += 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            raise SlackApiError(f"The request to the Slack API failed. (url: {method})",
+                                {"ok": False, "error": "ratelimited"})
+
+    def _post(self, channel, text):
+        with self.lock:
+            ts = f"{time.time():.0f}.{next(self._ts):06d}"
+            self.messages[(channel, ts)] = text
+        return {"ok": True, "channel": channel, "ts": ts}
+
+    def _update(self, channel, ts, text):
+        with self.lock:
+            self.messages[(channel, ts)] = text
+            self.updates += 1
+        return {"ok": True, "channel": channel, "ts": ts}
+
+    def chat_postMessage(self, channel, text, **kwargs):
+        time.sleep(self.latency)
+        self._begin("chat.postMessage")
+        return self._post(channel, text)
+
+    def chat_update(self, channel, ts, text, **kwargs):
+        time.sleep(self.latency)
+        self._begin("chat.update")
+        return self._update(channel, ts, text)
+
+    def sayer(self, channel):
+        """The say() Bolt would pass for a message in channel."""
+        def say(text, **kwargs):
+            return self.chat_postMessage(channel, text, **kwargs)
+        return say
+
+
+class FakeAsyncSlackClient(FakeSlackClient):
+    async def chat_postMessage(self, channel, text, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._begin("chat.postMessage")
+        return self._post(channel, text)
+
+    async def chat_update(self, channel, ts, text, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._begin("chat.update")
+        return self._update(channel, ts, text)
+
+    def sayer(self, channel):
+        async def say(text, **kwargs):
+            return await self.chat_postMessage(channel, text, **kwargs)
+        return say
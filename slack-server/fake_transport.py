@@ -0,0 +1,66 @@
+import random
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def _http_error(status, reason):
+    resp = httplib2.Response({"status": status})
+    resp.reason = reason
+    return HttpError(resp, reason.encode())
+
+
+class FakeTransport:
+    """Stands in for send_message or gmail_transport: records what would be sent, no network.
+
+    Each send sleeps `latency` seconds, and a share `error_rate` of them
+    fail with a 429 (or whatever `error_status` is) so retry paths can be
+    exercised. Also tracks how many sends were in flight at once and the
+    busiest one-second window, to check the rate limiter.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, error_status: int = 429, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sent = []
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.call_times = []
+
+    def __call__(self, create_message):
+        with self.lock:
+            self.calls += 1
+            self.call_times.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.random.random() < self.error_rate
+        try:
+            time.sleep(self.latency)
+            if fail:
+                with self.lock:
+                    self.errors += 1
+                raise _http_error(self.error_status, "rateLimitExceeded" if self.error_status == 429 else "Error")
+            with self.lock:
+                self.sent.append(create_message)
+                return {"id": f"sent-{len(self.sent)}", "labelIds": ["SENT"]}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def peak_rate(self) -> int:
+        """Most sends started within any one second."""
+        times = sorted(self.call_times)
+        best = 0
+        first = 0
+        for i, t in enumerate(times):
+            while t - times[first] >= 1.0:
+                first += 1
+            best = max(best, i - first + 1)
+        return best
@@ -0,0 +1,112 @@
+import bisect
+from datetime import datetime
+from typing import Dict, List
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+import scheduling
+
+# The freebusy API answers for at most 50 calendars per query
+FREEBUSY_MAX_CALENDARS = 50
+
+
+def query_freebusy(service, calendar_ids: List[str], time_min: datetime, time_max: datetime,
+                   chunk_size: int = FREEBUSY_MAX_CALENDARS):
+    """One logical freebusy query for any number of calendars.
+
+    Splits the IDs into chunks the API accepts and merges the responses
+    into a single {'calendars': {...}} result.
+    """
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+    merged = {'timeMin': time_min.isoformat() + 'Z', 'timeMax': time_max.isoformat() + 'Z', 'calendars': {}}
+    for i in range(0, len(calendar_ids), chunk_size):
+        body = {
+            "timeMin": merged['timeMin'],
+            "timeMax": merged['timeMax'],
+            "items": [{"id": cal_id} for cal_id in calendar_ids[i:i + chunk_size]],
+        }
+        with metrics.timer("calendar_freebusy_seconds"):
+            result = google_api.api("calendar").execute(
+                service.freebusy().query(body=body), "freebusy.query", coalesce=True
+            )
+        merged['calendars'].update(result.get('calendars', {}))
+    return merged
+
+
+class Bookings:
+    """Intervals handed out so far, per person, kept sorted for bisect lookups."""
+
+    def __init__(self):
+        self.starts: Dict[str, list] = {}
+        self.ends: Dict[str, list] = {}
+
+    def is_free(self, person, start, end) -> bool:
+        starts = self.starts.get(person)
+        if not starts:
+            return True
+        # The only booking that can overlap is the last one starting before end
+        i = bisect.bisect_left(starts, end) - 1
+        return i < 0 or self.ends[person][i] <= start
+
+    def add(self, person, start, end):
+        starts = self.starts.setdefault(person, [])
+        ends = self.ends.setdefault(person, [])
+        i = bisect.bisect_left(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+
+
+def schedule_batch(service, requests, days_ahead: int = 14, step_minutes: int = 30, start: datetime = None,
+                   freebusy_result=None, freebusy_cache=None, working_hours=None):
+    """Assign non-overlapping interview slots to many requests at once.
+
+    requests is a list of dicts with 'candidate', 'panel' (list of
+    interviewer calendar IDs) and optionally 'duration_minutes' (default 60).
+    All panels are looked up in one chunked freebusy query (pass
+    freebusy_result to skip it, or a FreeBusyCache to reuse recent
+    answers). Requests are then served most-constrained first, each taking
+    its earliest slot where no panelist, and not the candidate, already has
+    a booking from this batch. working_hours maps panelists to their
+    WorkingHours, as in scheduling.free_slot_starts.
+
+    Returns one assignment per request, in the input order, with 'slot' set
+    to None when nothing fits.
+    """
+    window_start, window_end = scheduling.search_window(start, days_ahead)
+
+    if freebusy_result is None:
+        panelists = [p for r in requests for p in r['panel']]
+        time_min = datetime.utcfromtimestamp(window_start)
+        time_max = datetime.utcfromtimestamp(window_end)
+        if freebusy_cache is not None:
+            freebusy_result = freebusy_cache.query(panelists, time_min, time_max)
+        else:
+            freebusy_result = query_freebusy(service, panelists, time_min, time_max)
+    busy = scheduling.parse_busy_by_calendar(freebusy_result)
+
+    # Slots each request could take if it were the only one
+    feasible = [
+        scheduling.free_slot_starts(busy, r['panel'], r.get('duration_minutes', 60), window_start, window_end,
+                                    working_hours, step_minutes)
+        for r in requests
+    ]
+
+    bookings = Bookings()
+    assignments = [None] * len(requests)
+    # Requests with the fewest options go first so they aren't starved
+    for i in sorted(range(len(requests)), key=lambda i: len(feasible[i])):
+        r = requests[i]
+        duration_minutes = r.get('duration_minutes', 60)
+        people = list(r['panel']) + [('candidate', r['candidate'])]
+        slot = None
+        for ts in feasible[i].tolist():
+            end = ts + duration_minutes * 60
+            if all(bookings.is_free(p, ts, end) for p in people):
+                for p in people:
+                    bookings.add(p, ts, end)
+                slot = scheduling.make_slot(ts, duration_minutes)
+                break
+        assignments[i] = {'candidate': r['candidate'], 'panel': list(r['panel']), 'slot': slot}
+
+    return assignments
@@ -0,0 +1,104 @@
+"""Load test availability lookups and batch scheduling against a fake Calendar API.
+
+No network or credentials needed. Each round asks for the free/busy times of
+one interview panel drawn from a pool of interviewers and looks for common
+slots, uncached and through FreeBusyCache; the cached pass is then run
+again, so every window has slid on a little as it does between real
+lookups. Then large batches of requests are scheduled at once with
+schedule_batch. Reports throughput and p50/p99 per entry point:
+
+    python bench_load.py --interviewers 200 --panel-size 8 --rounds 100 --latency 0.15
+    python bench_load.py --batch-requests 300 --error-rate 0.05 --save base.json
+    python bench_load.py --batch-requests 300 --error-rate 0.05 --baseline base.json
+"""
+import argparse
+import contextlib
+import io
+import random
+import sys
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import loadtest
+import scheduling
+import testing
+from batch_scheduling import schedule_batch
+from fake_calendar import FakeCalendarService
+from freebusy_cache import FreeBusyCache
+
+
+def panels(rounds, interviewers, size, rng):
+    pool = [f"interviewer{i}@example.com" for i in range(interviewers)]
+    for _ in range(rounds):
+        yield rng.sample(pool, min(size, len(pool)))
+
+
+def batch_requests(count, interviewers, size, rng):
+    pool = [f"interviewer{i}@example.com" for i in range(interviewers)]
+    return [{'candidate': f"candidate{i}@example.com", 'panel': rng.sample(pool, min(size, len(pool))),
+             'duration_minutes': rng.choice((30, 45, 60))} for i in range(count)]
+
+
+def lookup(recorder, name, service, panel, days, cache=None):
+    """get_freebusy then find_common_free_slots for one panel, as testing.main does."""
+    try:
+        # get_freebusy narrates every lookup to stdout
+        with recorder.time(name), contextlib.redirect_stdout(io.StringIO()):
+            result = testing.get_freebusy(service, panel, days, cache=cache)
+    except Exception:
+        return
+    with recorder.time("find_common_free_slots"):
+        scheduling.find_common_free_slots(result, 60, 5, days=days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviewers", type=int, default=200)
+    parser.add_argument("--panel-size", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=100, help="panel lookups per pass")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--meetings", type=int, default=3, help="meetings per interviewer per weekday")
+    parser.add_argument("--batch-requests", type=int, default=200, help="requests per schedule_batch call")
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per freebusy query")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of freebusy queries that fail")
+    parser.add_argument("--seed", type=int, default=7)
+    loadtest.add_arguments(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    service = FakeCalendarService(args.latency, args.error_rate, meetings_per_day=args.meetings, seed=args.seed)
+    recorder = loadtest.Recorder()
+    lookups = list(panels(args.rounds, args.interviewers, args.panel_size, rng))
+
+    with recorder.phase("get_freebusy", "find_common_free_slots"):
+        for panel in lookups:
+            lookup(recorder, "get_freebusy", service, panel, args.days)
+    uncached_queries = service.calls["freebusy.query"]
+
+    cache = FreeBusyCache(service)
+    queries = {}
+    for name in ("get_freebusy_cached", "get_freebusy_cached_again"):
+        before = cache.api_queries
+        with recorder.phase(name):
+            for panel in lookups:
+                lookup(recorder, name, service, panel, args.days, cache)
+        queries[name] = cache.api_queries - before
+
+    for _ in range(args.batches):
+        requests = batch_requests(args.batch_requests, args.interviewers, args.panel_size, rng)
+        with recorder.phase("schedule_batch"):
+            try:
+                with recorder.time("schedule_batch"):
+                    schedule_batch(service, requests, args.days)
+            except Exception:
+                pass
+
+    print(f"interviewers={args.interviewers} panel_size={args.panel_size} latency={args.latency}s "
+          f"error_rate={args.error_rate} errors={service.errors}\n"
+          f"queries for {len(lookups)} lookups: uncached={uncached_queries} "
+          f"cached={queries['get_freebusy_cached']} cached_again={queries['get_freebusy_cached_again']}\n")
+    sys.exit(loadtest.finish(args, recorder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Puts the repo's common/ directory on sys.path.
+
+google_api, google_services, metrics and loadtest live there once for every
+server; import this before them.
+"""
+import os
+import sys
+
+COMMON_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+
+# Right after the script's own directory, ahead of anything installed
+if COMMON_DIR not in sys.path:
+    sys.path.insert(1, COMMON_DIR)
@@ -0,0 +1,129 @@
+"""Offline stand-in for the Calendar API client, for benchmarks and load tests.
+
+Only freebusy().query() is implemented. Every calendar gets a made-up but
+repeatable schedule: the meetings on a given day depend only on the seed,
+the calendar ID and the date, so overlapping or repeated queries (and
+FreeBusyCache) see the same busy times a real calendar would return.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import scheduling
+
+# The real API rejects a query with more calendars than this
+MAX_CALENDARS = 50
+
+
+def _http_error(status, reason):
+    resp = httplib2.Response({"status": status})
+    resp.reason = reason
+    return HttpError(resp, reason.encode())
+
+
+def _parse(iso: str) -> datetime:
+    return datetime.fromisoformat(iso.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeRequest:
+    def __init__(self, service, fn):
+        self.service = service
+        self.fn = fn
+
+    def execute(self):
+        self.service.calls["freebusy.query"] += 1
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        self.service.maybe_fail()
+        return self.fn()
+
+
+class FakeCalendarService:
+    """Sleeps `latency` per call; a share `error_rate` of calls fail with `error_status`.
+
+    Each calendar has `meetings_per_day` 30-90 minute meetings on weekdays,
+    during Vancouver working hours. IDs listed in `unknown` come back with a
+    notFound error, like a calendar the account can't see.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 meetings_per_day: int = 3, unknown=(), seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.meetings_per_day = meetings_per_day
+        self.unknown = set(unknown)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.errors = 0
+
+    def maybe_fail(self):
+        if not self.error_rate:
+            return
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            raise _http_error(self.error_status, "rateLimitExceeded" if self.error_status == 429 else "backendError")
+
+    def meetings(self, calendar_id, day):
+        """The calendar's meetings on a local date, as (start, end) UTC datetimes."""
+        if day.weekday() >= 5:
+            return []
+        rng = random.Random(f"{self.seed}:{calendar_id}:{day.isoformat()}")
+        meetings = []
+        for _ in range(self.meetings_per_day):
+            local = datetime(day.year, day.month, day.day, rng.randrange(8, 17), rng.choice((0, 15, 30, 45)))
+            begin = scheduling.LOCAL_TZ.localize(local).astimezone(timezone.utc)
+            meetings.append((begin, begin + timedelta(minutes=rng.choice((30, 45, 60, 90)))))
+        return sorted(meetings)
+
+    def busy(self, calendar_id, time_min, time_max):
+        day = time_min.astimezone(scheduling.LOCAL_TZ).date()
+        last = time_max.astimezone(scheduling.LOCAL_TZ).date()
+        busy = []
+        while day <= last:
+            for begin, end in self.meetings(calendar_id, day):
+                if end > time_min and begin < time_max:
+                    busy.append({'start': _iso(max(begin, time_min)), 'end': _iso(min(end, time_max))})
+            day += timedelta(days=1)
+        return busy
+
+    # googleapiclient-shaped surface
+
+    def freebusy(self):
+        return _FakeFreeBusy(self)
+
+
+class _FakeFreeBusy:
+    def __init__(self, service):
+        self.service = service
+
+    def query(self, body):
+        def run():
+            items = body.get('items', [])
+            if len(items) > MAX_CALENDARS:
+                raise _http_error(400, "tooManyCalendarsRequestedForTimeRange")
+            time_min, time_max = _parse(body['timeMin']), _parse(body['timeMax'])
+            calendars = {}
+            for item in items:
+                cal_id = item['id']
+                if cal_id in self.service.unknown:
+                    calendars[cal_id] = {'errors': [{'domain': 'global', 'reason': 'notFound'}], 'busy': []}
+                else:
+                    calendars[cal_id] = {'busy': self.service.busy(cal_id, time_min, time_max)}
+            return {'kind': 'calendar#freeBusy', 'timeMin': body['timeMin'], 'timeMax': body['timeMax'],
+                    'calendars': calendars}
+        return FakeRequest(self.service, run)
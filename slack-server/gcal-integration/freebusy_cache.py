@@ -0,0 +1,155 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+import scheduling
+from batch_scheduling import query_freebusy
+
+# Fetches are widened to whole hours, so a window that slides by a few
+# seconds between lookups is still covered instead of costing a query
+FETCH_GRID_SECONDS = 3600
+
+
+def _epoch(dt: datetime) -> int:
+    """Naive datetimes are taken as UTC, like the ones get_freebusy builds."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _utc(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def _iso(ts: int) -> str:
+    return _utc(ts).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FreeBusyCache:
+    """Parsed busy intervals per calendar, with the time ranges they cover.
+
+    query() only asks the Calendar API for the parts of the requested window
+    that aren't covered by a fetch younger than ttl seconds, so asking again
+    a minute later costs nothing and one more day at the end costs a short
+    query instead of the whole window. Everything a query() is missing, for
+    any of its calendars, is fetched in a single API query over the span of
+    the gaps, rounded out to `grid` seconds. Call invalidate() after booking
+    a slot so the affected calendars are re-read.
+    """
+
+    def __init__(self, service, ttl: float = 300, grid: int = FETCH_GRID_SECONDS):
+        self.service = service
+        self.ttl = ttl
+        self.grid = grid
+        self.lock = threading.Lock()
+        # calendar_id -> sorted disjoint [(start, end, fetched_at)]
+        self.covered = {}
+        # calendar_id -> (starts, ends) merged int64 epoch arrays
+        self.busy = {}
+        self.api_queries = 0
+
+    def _fresh_windows(self, cal_id, now):
+        windows = [w for w in self.covered.get(cal_id, []) if now - w[2] < self.ttl]
+        self.covered[cal_id] = windows
+        return windows
+
+    def _missing(self, cal_id, start, end, now):
+        """Sub-ranges of [start, end) not covered by a fresh fetch."""
+        missing = []
+        cursor = start
+        for w_start, w_end, _ in self._fresh_windows(cal_id, now):
+            if w_end <= cursor or w_start >= end:
+                continue
+            if w_start > cursor:
+                missing.append((cursor, w_start))
+            cursor = max(cursor, w_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def _store(self, cal_id, start, end, busy, now):
+        starts, ends = self.busy.get(cal_id, (np.array([], dtype=np.int64), np.array([], dtype=np.int64)))
+        # Whatever we knew inside this range is replaced by the fresh answer;
+        # intervals reaching outside it keep their outside part
+        before = starts < start
+        after = ends > end
+        new_starts = np.array([scheduling.to_epoch(b['start']) for b in busy], dtype=np.int64)
+        new_ends = np.array([scheduling.to_epoch(b['end']) for b in busy], dtype=np.int64)
+        self.busy[cal_id] = scheduling.merge_intervals(
+            np.concatenate((starts[before], np.maximum(starts[after], end), np.clip(new_starts, start, end))),
+            np.concatenate((np.minimum(ends[before], start), ends[after], np.clip(new_ends, start, end))),
+        )
+
+        windows = []
+        for w_start, w_end, fetched_at in self.covered.get(cal_id, []):
+            if w_start < start:
+                windows.append((w_start, min(w_end, start), fetched_at))
+            if w_end > end:
+                windows.append((max(w_start, end), w_end, fetched_at))
+        windows.append((start, end, now))
+        self.covered[cal_id] = sorted(windows)
+
+    def query(self, calendar_ids: List[str], time_min: datetime, time_max: datetime):
+        """Same shape as a freebusy().query() response, served from cache where possible."""
+        start, end = _epoch(time_min), _epoch(time_max)
+        now = time.monotonic()
+        errors = {}
+
+        with self.lock:
+            missing_ids = []
+            m_start, m_end = end, start
+            for cal_id in dict.fromkeys(calendar_ids):
+                missing_ranges = self._missing(cal_id, start, end, now)
+                metrics.incr("freebusy_cache_total", result="miss" if missing_ranges else "hit")
+                if missing_ranges:
+                    missing_ids.append(cal_id)
+                    m_start = min(m_start, missing_ranges[0][0])
+                    m_end = max(m_end, missing_ranges[-1][1])
+
+            if missing_ids:
+                m_start -= m_start % self.grid
+                m_end += -m_end % self.grid
+                result = query_freebusy(self.service, missing_ids, _utc(m_start), _utc(m_end))
+                self.api_queries += 1
+                for cal_id, cal_data in result.get('calendars', {}).items():
+                    if cal_data.get('errors'):
+                        # Don't cache a calendar we couldn't read
+                        errors[cal_id] = cal_data['errors']
+                        continue
+                    self._store(cal_id, m_start, m_end, cal_data.get('busy', []), now)
+
+            calendars = {}
+            for cal_id in dict.fromkeys(calendar_ids):
+                if cal_id in errors:
+                    calendars[cal_id] = {'errors': errors[cal_id], 'busy': []}
+                    continue
+                starts, ends = self.busy.get(cal_id, (np.array([], dtype=np.int64),) * 2)
+                inside = (ends > start) & (starts < end)
+                calendars[cal_id] = {'busy': [
+                    {'start': _iso(max(s, start)), 'end': _iso(min(e, end))}
+                    for s, e in zip(starts[inside].tolist(), ends[inside].tolist())
+                ]}
+
+        return {'timeMin': _iso(start), 'timeMax': _iso(end), 'calendars': calendars}
+
+    def invalidate(self, calendar_id: str = None, time_min: datetime = None, time_max: datetime = None):
+        """Forget cached coverage so the next query refetches it.
+
+        With no arguments everything goes; otherwise just one calendar,
+        optionally only the windows overlapping [time_min, time_max).
+        """
+        with self.lock:
+            cal_ids = list(self.covered) if calendar_id is None else [calendar_id]
+            for cal_id in cal_ids:
+                if time_min is None and time_max is None:
+                    self.covered.pop(cal_id, None)
+                    self.busy.pop(cal_id, None)
+                    continue
+                start = _epoch(time_min) if time_min else float('-inf')
+                end = _epoch(time_max) if time_max else float('inf')
+                self.covered[cal_id] = [w for w in self.covered.get(cal_id, []) if w[1] <= start or w[0] >= end]
@@ -0,0 +1,192 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Tuple
+
+import numpy as np
+import pytz
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+LOCAL_TZ = pytz.timezone("America/Vancouver")
+
+
+def to_epoch(iso: str) -> int:
+    return int(datetime.fromisoformat(iso.replace('Z', '+00:00')).timestamp())
+
+
+def parse_busy_by_calendar(freebusy_result):
+    """Parse every busy interval in a freebusy response once.
+
+    Returns {calendar_id: (starts, ends)} with each calendar's intervals
+    merged into sorted, disjoint int64 epoch-second arrays.
+    """
+    parsed = {}
+    for email, cal_data in freebusy_result.get('calendars', {}).items():
+        busy = cal_data.get('busy', [])
+        starts = np.array([to_epoch(b['start']) for b in busy], dtype=np.int64)
+        ends = np.array([to_epoch(b['end']) for b in busy], dtype=np.int64)
+        parsed[email] = merge_intervals(starts, ends)
+    return parsed
+
+
+def merge_intervals(starts, ends):
+    """Sweep-line merge of possibly overlapping intervals into sorted disjoint ones."""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    ends = np.maximum.accumulate(ends[order])
+    # A new merged interval begins wherever a start is past every earlier end
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] > ends[:-1]
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], len(starts)) - 1
+    return starts[group_starts], ends[group_ends]
+
+
+def free_gaps(busy_starts, busy_ends, window_start: int, window_end: int):
+    """Complement of merged busy intervals within [window_start, window_end)."""
+    inside = (busy_ends > window_start) & (busy_starts < window_end)
+    busy_starts = np.clip(busy_starts[inside], window_start, window_end)
+    busy_ends = np.clip(busy_ends[inside], window_start, window_end)
+    gap_starts = np.concatenate(([window_start], busy_ends))
+    gap_ends = np.concatenate((busy_starts, [window_end]))
+    keep = gap_ends > gap_starts
+    return gap_starts[keep], gap_ends[keep]
+
+
+class WorkingHours(NamedTuple):
+    """When someone can be interviewed, in their own time zone."""
+    tz: str = "America/Vancouver"
+    start: time = time(9)
+    end: time = time(17)
+    weekdays: Tuple[int, ...] = (0, 1, 2, 3, 4)
+    holidays: FrozenSet[date] = frozenset()
+
+
+DEFAULT_WORKING_HOURS = WorkingHours()
+
+
+@lru_cache(maxsize=256)
+def business_hours_mask(hours: WorkingHours, window_start: int, window_end: int):
+    """Working-hour intervals inside [window_start, window_end) as epoch arrays.
+
+    Built once per (hours, window) and cached. Each local day is localized
+    on its own, so DST changes land on the right wall-clock hour.
+    """
+    tz = pytz.timezone(hours.tz)
+    first = datetime.fromtimestamp(window_start, tz).date() - timedelta(days=1)
+    last = datetime.fromtimestamp(window_end, tz).date()
+    starts = []
+    ends = []
+    day = first
+    while day <= last:
+        if day.weekday() in hours.weekdays and day not in hours.holidays:
+            starts.append(int(tz.localize(datetime.combine(day, hours.start)).timestamp()))
+            ends.append(int(tz.localize(datetime.combine(day, hours.end)).timestamp()))
+        day += timedelta(days=1)
+    starts = np.clip(np.array(starts, dtype=np.int64), window_start, window_end)
+    ends = np.clip(np.array(ends, dtype=np.int64), window_start, window_end)
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    starts.flags.writeable = False
+    ends.flags.writeable = False
+    return starts, ends
+
+
+def intersect_all(interval_sets):
+    """Intersection of several sorted, disjoint interval sets in one sweep."""
+    k = len(interval_sets)
+    positions = np.concatenate([np.concatenate((s, e)) for s, e in interval_sets])
+    deltas = np.concatenate([np.concatenate((np.ones(len(s), np.int64), -np.ones(len(e), np.int64)))
+                             for s, e in interval_sets])
+    if len(positions) == 0:
+        return positions, positions
+    order = np.argsort(positions, kind='stable')
+    positions, deltas = positions[order], deltas[order]
+    # Net change at each distinct boundary, then how many sets cover what follows it
+    bounds, first_idx = np.unique(positions, return_index=True)
+    depth = np.cumsum(np.add.reduceat(deltas, first_idx))
+    inside = np.flatnonzero(depth[:-1] == k)
+    return bounds[inside], bounds[inside + 1]
+
+
+def tile_slots(free_starts, free_ends, duration: int, step: int):
+    """Every slot start on the step grid whose whole slot fits in a free interval."""
+    first = -(-free_starts // step) * step
+    counts = np.maximum((free_ends - duration - first) // step + 1, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return np.array([], dtype=np.int64)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(first, counts) + offsets * step
+
+
+def free_slot_starts(busy_by_calendar, attendees, duration_minutes: int, window_start: int, window_end: int,
+                     working_hours=None, step_minutes: int = 30):
+    """Start times (epoch seconds) when every attendee is within working hours and free.
+
+    working_hours maps attendee -> WorkingHours; anyone missing gets
+    DEFAULT_WORKING_HOURS. The business-hours masks are intersected first,
+    then the merged busy time of everyone is cut out, so no time zone
+    conversion happens per candidate slot.
+    """
+    with metrics.timer("slot_search_seconds"):
+        return _free_slot_starts(busy_by_calendar, attendees, duration_minutes, window_start, window_end,
+                                 working_hours, step_minutes)
+
+
+def _free_slot_starts(busy_by_calendar, attendees, duration_minutes, window_start, window_end,
+                      working_hours, step_minutes):
+    working_hours = working_hours or {}
+    masks = {working_hours.get(a, DEFAULT_WORKING_HOURS) for a in attendees} or {DEFAULT_WORKING_HOURS}
+    interval_sets = [business_hours_mask(h, window_start, window_end) for h in masks]
+
+    empty = np.array([], dtype=np.int64)
+    parts = [busy_by_calendar.get(a, (empty, empty)) for a in attendees]
+    busy_starts, busy_ends = merge_intervals(
+        np.concatenate([s for s, _ in parts] + [empty]),
+        np.concatenate([e for _, e in parts] + [empty]),
+    )
+    interval_sets.append(free_gaps(busy_starts, busy_ends, window_start, window_end))
+
+    free_starts, free_ends = intersect_all(interval_sets)
+    return tile_slots(free_starts, free_ends, duration_minutes * 60, step_minutes * 60)
+
+
+def search_window(start: datetime = None, days: int = 14):
+    """[start of `start`'s local day, + days) as epoch seconds; defaults to tomorrow."""
+    if start is None:
+        start = datetime.now(LOCAL_TZ).replace(tzinfo=None) + timedelta(days=1)
+    first = LOCAL_TZ.localize(datetime.combine(start.date(), time()))
+    last = LOCAL_TZ.localize(datetime.combine(start.date() + timedelta(days=days), time()))
+    return int(first.timestamp()), int(last.timestamp())
+
+
+def find_common_free_slots(freebusy_result, duration_minutes: int = 60, max_slots: int = 5,
+                           step_minutes: int = 30, days: int = 14, start: datetime = None,
+                           working_hours=None):
+    """Find time slots when ALL people are free and within their working hours.
+
+    Busy intervals are parsed once and merged per attendee, intersected
+    with the precomputed business-hours masks, and the slots that fit are
+    tiled out of the remaining free intervals in one vectorized pass.
+    """
+    window_start, window_end = search_window(start, days)
+    attendees = list(freebusy_result.get('calendars', {}))
+    slot_starts = free_slot_starts(parse_busy_by_calendar(freebusy_result), attendees, duration_minutes,
+                                   window_start, window_end, working_hours, step_minutes)
+    return [make_slot(ts, duration_minutes) for ts in slot_starts[:max_slots].tolist()]
+
+
+def make_slot(ts: int, duration_minutes: int):
+    """Slot dict in the shape print_free_slots expects, in local wall-clock time."""
+    slot_start = datetime.fromtimestamp(ts, LOCAL_TZ).replace(tzinfo=None)
+    slot_end = slot_start + timedelta(minutes=duration_minutes)
+    return {
+        'start': slot_start,
+        'end': slot_end,
+        'display': slot_start.strftime('%A, %B %d at %I:%M %p')
+    }
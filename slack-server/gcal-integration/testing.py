@@ -5,8 +5,12 @@ from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from typing import List, Dict
-import pytz
+from typing import List
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+import scheduling
 
 # Scopes - what permissions we need
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
@@ -35,11 +39,16 @@ def authenticate():
     
     return build('calendar', 'v3', credentials=creds)
 
-def get_freebusy(service, emails: List[str], days_ahead: int = 14):
-    """Get free/busy info for a list of email addresses"""
+def get_freebusy(service, emails: List[str], days_ahead: int = 14, cache=None):
+    """Get free/busy info for a list of email addresses
+
+    With a FreeBusyCache only the parts of the window it hasn't seen
+    recently are fetched from the API.
+    """
     
-    time_min = datetime.utcnow().isoformat() + 'Z'
-    time_max = (datetime.utcnow() + timedelta(days=days_ahead)).isoformat() + 'Z'
+    now = datetime.utcnow()
+    time_min = now.isoformat() + 'Z'
+    time_max = (now + timedelta(days=days_ahead)).isoformat() + 'Z'
     
     body = {
         "timeMin": time_min,
@@ -51,7 +60,13 @@ def get_freebusy(service, emails: List[str], days_ahead: int = 14):
     print(f"📅 From: {time_min}")
     print(f"📅 To: {time_max}\n")
     
-    freebusy_result = service.freebusy().query(body=body).execute()
+    if cache is not None:
+        return cache.query(emails, now, now + timedelta(days=days_ahead))
+
+    with metrics.timer("calendar_freebusy_seconds"):
+        freebusy_result = google_api.api("calendar").execute(
+            service.freebusy().query(body=body), "freebusy.query", coalesce=True
+        )
     
     return freebusy_result
 
@@ -81,70 +96,7 @@ def find_common_free_slots(freebusy_result, duration_minutes: int = 60, max_slot
     print(f"\n\n🎯 Finding {duration_minutes}-minute slots when everyone is free...")
     print("=" * 50)
     
-    calendars = freebusy_result.get('calendars', {})
-    
-    # Start from tomorrow at 9 AM
-    start_time = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
-    end_search = start_time + timedelta(days=14)
-    
-    free_slots = []
-    current = start_time
-    
-    while current < end_search and len(free_slots) < max_slots:
-        # Skip weekends
-        if current.weekday() >= 5:
-            current += timedelta(days=1)
-            current = current.replace(hour=9, minute=0)
-            continue
-        
-        # Only check business hours (9 AM - 5 PM)
-        if current.hour < 9:
-            current = current.replace(hour=9, minute=0)
-        elif current.hour >= 17:
-            current += timedelta(days=1)
-            current = current.replace(hour=9, minute=0)
-            continue
-        
-        slot_end = current + timedelta(minutes=duration_minutes)
-        
-        # Check if this slot is free for ALL people
-        if is_slot_free_for_all(calendars, current, slot_end):
-            free_slots.append({
-                'start': current,
-                'end': slot_end,
-                'display': current.strftime('%A, %B %d at %I:%M %p')
-            })
-        
-        # Move to next 30-minute interval
-        current += timedelta(minutes=30)
-    
-    return free_slots
-
-def is_slot_free_for_all(calendars: Dict, slot_start: datetime, slot_end: datetime) -> bool:
-    """Check if a time slot is free for all people"""
-    
-    local_tz = pytz.timezone("America/Vancouver")
-
-    for email, cal_data in calendars.items():
-        busy_times = cal_data.get('busy', [])
-        
-        for busy in busy_times:
-
-            busy_start = datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
-            busy_start = busy_start.astimezone(local_tz) 
-
-            busy_end = datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
-            busy_end = busy_end.astimezone(local_tz) 
-            
-            # Make timezone-naive for comparison
-            busy_start = busy_start.replace(tzinfo=None)
-            busy_end = busy_end.replace(tzinfo=None)
-            
-            # Check for overlap
-            if not (slot_end <= busy_start or slot_start >= busy_end):
-                return False  # There's an overlap, slot is not free
-    
-    return True
+    return scheduling.find_common_free_slots(freebusy_result, duration_minutes, max_slots)
 
 def print_free_slots(free_slots):
     """Print the free slots found"""
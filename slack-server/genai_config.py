@@ -0,0 +1,24 @@
+from google.genai import types
+
+from gmail_sender import send_schedule_interview_email, send_schedule_interview_email_declaration
+from match_scoring import shortlist_candidates, shortlist_candidates_declaration
+from resume_index import search_applicants, search_applicants_declaration
+
+MODEL = "gemini-2.5-flash"
+
+SYSTEM_PROMPT = "You are a helpful assistant that answers Slack messages clearly and concisely."
+
+# Declaration name -> the function that carries it out
+TOOL_FUNCTIONS = {
+    send_schedule_interview_email_declaration["name"]: send_schedule_interview_email,
+    search_applicants_declaration["name"]: search_applicants,
+    shortlist_candidates_declaration["name"]: shortlist_candidates,
+}
+
+# Built once at startup and shared by every message handler
+TOOLS = types.Tool(function_declarations=[
+    send_schedule_interview_email_declaration,
+    search_applicants_declaration,
+    shortlist_candidates_declaration,
+])
+GENERATE_CONFIG = types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT, tools=[TOOLS])
@@ -1,67 +1,78 @@
 import base64
+import logging
 from email.message import EmailMessage
-import os.path
+from string import Template
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import google_api
+import metrics
+from google_services import ServiceManager
+
+logger = logging.getLogger(__name__)
+
 SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 
+# The token.json stores the user's access and refresh tokens. It is loaded once
+# (running the authorization flow the first time) and kept fresh in the background.
+gmail_services = ServiceManager("gmail", "v1", SCOPES)
 
-def send_schedule_interview_email(message_content: str, applicant_email: str, applicant_name: str):
-    creds = None
-    # The file token.json stores the user's access and refresh tokens, and is
-    # created automatically when the authorization flow completes for the first
-    # time.
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials.json", SCOPES
-            )
-            creds = flow.run_local_server(port=0)
-        # Save the credentials for the next run
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
 
-    try:
-        # Call the Gmail API to send the email
-        service = build("gmail", "v1", credentials=creds)
-        message = EmailMessage()
+FROM_ADDRESS = "candidateagent9@gmail.com"
+
+SUBJECT_TEMPLATE = "Congrats $applicant_name! You've been scheduled for an interview."
+
+
+def build_invite(message_content: str, applicant_email: str, applicant_name: str,
+                 subject_template: str = SUBJECT_TEMPLATE):
+    """Gmail API send body for one interview invite."""
+    message = EmailMessage()
 
-        # TODO: make template for message content
+    # TODO: have scheduling link in message content
+    message.set_content(message_content)
+    message["To"] = applicant_email
+    message["From"] = FROM_ADDRESS
 
-        # TODO: have scheduling link in message content
-        message.set_content(message_content)
-        message["To"] = applicant_email
-        message["From"] = "candidateagent9@gmail.com"
+    subject = Template(subject_template).safe_substitute(applicant_name=applicant_name)
+    message["Subject"] = subject
 
-        subject = f"Congrats {applicant_name}! You've been scheduled for an interview."
-        message["Subject"] = subject
+    encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
 
-        encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+    return {"raw": encoded_message}
 
-        create_message = {"raw": encoded_message}
 
+def send_message(create_message):
+    """Send a prepared message with a pooled Gmail client: one bare call, for callers that pace it themselves."""
+    with gmail_services.service() as service, metrics.timer("gmail_call_seconds", call="send"):
+        return service.users().messages().send(userId="me", body=create_message).execute()
 
-        send_message = (
+
+def gmail_transport(create_message):
+    """Send a prepared message with a pooled Gmail client.
+
+    Goes through the shared Gmail rate limiter, retries and circuit breaker.
+    """
+    with gmail_services.service() as service, metrics.timer("gmail_call_seconds", call="send"):
+        return google_api.api("gmail").execute(
             service.users()
             .messages()
-            .send(userId="me", body=create_message)
-            .execute()
+            .send(userId="me", body=create_message),
+            "messages.send",
         )
 
-    except HttpError as error:
-        print(f"An error occurred: {error}")
-        send_message = None
-    return send_message
+
+def send_schedule_interview_email(message_content: str, applicant_email: str, applicant_name: str):
+    try:
+        create_message = build_invite(message_content, applicant_email, applicant_name)
+
+        # Call the Gmail API to send the email
+        sent = gmail_transport(create_message)
+
+    except (HttpError, google_api.CircuitOpenError) as error:
+        logger.error("An error occurred: %s", error)
+        sent = None
+    return sent
 
 
 send_schedule_interview_email_declaration = {
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.request
+
+import numpy as np
+from scipy import sparse
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from resume_index import ResumeIndex, shared_index, tokenize
+
+# Title and requirements say more about fit than the marketing copy does
+FIELD_WEIGHTS = {"title": 2, "requirements": 2, "responsibilities": 1, "description": 1}
+
+
+def fetch_active_jobs():
+    """Active jobs from the Supabase REST API."""
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL / SUPABASE_KEY not set")
+    req = urllib.request.Request(
+        f"{url}/rest/v1/jobs?select=*&status=eq.active",
+        headers={"apikey": key, "Authorization": f"Bearer {key}"},
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.load(resp)
+
+
+def job_term_counts(job):
+    """Weighted term counts of a jobs row, from its title, text and arrays."""
+    counts = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = job.get(field) or ""
+        text = " ".join(value) if isinstance(value, list) else value
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + weight
+    return counts
+
+
+def _job_key(job):
+    content = json.dumps({f: job.get(f) for f in FIELD_WEIGHTS}, sort_keys=True)
+    return job["id"], hashlib.sha256(content.encode()).hexdigest()
+
+
+class MatchScorer:
+    """Scores every applicant against every job in one sparse matrix product.
+
+    Applicants are rows of a CSR matrix of sublinear TF-IDF weights over the
+    resume vocabulary, L2-normalized; jobs are encoded the same way, with
+    the same vocabulary and IDF, so A @ J.T is the cosine similarity of
+    every (applicant, job) pair. Job vectors are cached by job ID and
+    content hash and only rebuilt when a posting changes or the applicant
+    vocabulary does.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.applicant_ids = []
+        self.applicant_jobs = np.array([], dtype=object)
+        self.vocab = {}
+        self.idf = np.array([])
+        self.matrix = sparse.csr_matrix((0, 0))
+        self.job_counts = {}
+        self.job_vectors = {}
+
+    def load_applicants(self, applicant_ids, term_counts, applied_to=None):
+        """Build the applicant matrix from one {term: count} dict per applicant."""
+        vocab = {}
+        rows, cols, vals = [], [], []
+        for row, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                cols.append(vocab.setdefault(term, len(vocab)))
+                rows.append(row)
+                vals.append(tf)
+        self._set_matrix(applicant_ids, vocab, np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+                         np.array(vals, dtype=np.float64), applied_to)
+
+    def load_index(self, index: ResumeIndex):
+        """Build the applicant matrix straight from a ResumeIndex's postings."""
+        with index.lock:
+            applicants = index.db.execute("SELECT applicant_id, job_id FROM applicants ORDER BY applicant_id").fetchall()
+            postings = index.db.execute("SELECT applicant_id, term, tf FROM postings").fetchall()
+        row_of = {a[0]: i for i, a in enumerate(applicants)}
+        vocab = {}
+        rows = np.fromiter((row_of[p[0]] for p in postings), dtype=np.int64, count=len(postings))
+        cols = np.fromiter((vocab.setdefault(p[1], len(vocab)) for p in postings), dtype=np.int64, count=len(postings))
+        vals = np.fromiter((p[2] for p in postings), dtype=np.float64, count=len(postings))
+        self._set_matrix([a[0] for a in applicants], vocab, rows, cols, vals, [a[1] for a in applicants])
+
+    def _set_matrix(self, applicant_ids, vocab, rows, cols, vals, applied_to):
+        n = len(applicant_ids)
+        counts = sparse.csr_matrix((vals, (rows, cols)), shape=(n, len(vocab)))
+        df = np.bincount(counts.indices, minlength=len(vocab))
+        idf = np.log((1 + n) / (1 + df)) + 1
+        counts.data = 1 + np.log(counts.data)
+        weighted = sparse.csr_matrix(counts.multiply(idf))
+        with self.lock:
+            self.applicant_ids = list(applicant_ids)
+            self.applicant_jobs = np.array(applied_to if applied_to is not None else [None] * n, dtype=object)
+            self.vocab = vocab
+            self.idf = idf
+            self.matrix = _normalize_rows(weighted)
+            self.job_vectors = {}
+
+    def _job_vector(self, job):
+        key = _job_key(job)
+        cached = self.job_vectors.get(key)
+        if cached is not None:
+            return cached
+        counts = self.job_counts.get(key)
+        if counts is None:
+            counts = job_term_counts(job)
+            self.job_counts[key] = counts
+        cols = [self.vocab[t] for t in counts if t in self.vocab]
+        vals = [1 + np.log(counts[t]) for t in counts if t in self.vocab]
+        vector = np.zeros(len(self.vocab))
+        vector[cols] = vals
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        self.job_vectors[key] = vector
+        return vector
+
+    def score(self, jobs):
+        """Dense (applicants x jobs) cosine similarity matrix."""
+        with self.lock:
+            if not jobs or not self.applicant_ids:
+                return np.zeros((len(self.applicant_ids), len(jobs)))
+            job_matrix = np.column_stack([self._job_vector(job) for job in jobs])
+            return np.asarray(self.matrix @ job_matrix)
+
+    def shortlists(self, jobs, k: int = 10, applied_only: bool = False):
+        """Top-k applicants per job: {job_id: [(applicant_id, score), ...]}, best first.
+
+        With applied_only, a job's shortlist only has people who applied to it;
+        otherwise everyone is ranked against every job.
+        """
+        scores = self.score(jobs)
+        shortlists = {}
+        for j, job in enumerate(jobs):
+            column = scores[:, j].copy()
+            if applied_only:
+                column[self.applicant_jobs != job["id"]] = -1
+            top = min(k, len(column))
+            if top == 0:
+                shortlists[job["id"]] = []
+                continue
+            best = np.argpartition(-column, top - 1)[:top]
+            best = best[np.argsort(-column[best], kind="stable")]
+            shortlists[job["id"]] = [(self.applicant_ids[i], round(float(column[i]), 4))
+                                     for i in best.tolist() if column[i] > 0]
+        return shortlists
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+_shared_scorer = MatchScorer()
+_shared_lock = threading.Lock()
+_shared_state = {"version": None}
+
+
+def shortlist_candidates(job_id: str, k: int = 5, applied_only: bool = True):
+    """Tool entry point for the bot: best matching applicants for one active job."""
+    index = shared_index()
+    # Only rebuild the applicant matrix when the ingestion worker stored resumes;
+    # tool calls run in parallel, so one of them rebuilds while the rest wait
+    with _shared_lock:
+        version = index.version()
+        if _shared_state["version"] != version:
+            _shared_scorer.load_index(index)
+            _shared_state["version"] = version
+    jobs = [job for job in fetch_active_jobs() if job["id"] == job_id]
+    if not jobs:
+        return {"error": f"No active job with id {job_id}"}
+    with metrics.timer("match_score_seconds"):
+        shortlist = _shared_scorer.shortlists(jobs, int(k), applied_only)[job_id]
+    results = []
+    for applicant_id, score in shortlist:
+        applicant = index.applicant(applicant_id)
+        if applicant is None:
+            # Removed since the matrix was built
+            continue
+        results.append({"applicant_id": applicant_id, "name": applicant["name"], "email": applicant["email"],
+                        "score": score})
+    return {"job": jobs[0]["title"], "shortlist": results}
+
+
+shortlist_candidates_declaration = {
+    "name": "shortlist_candidates",
+    "description": "Ranks applicants by how well their resume matches a job's requirements and returns the top ones.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "job_id": {
+                "type": "string",
+                "description": "ID of the active job posting.",
+            },
+            "k": {
+                "type": "integer",
+                "description": "How many candidates to return (default 5).",
+            },
+            "applied_only": {
+                "type": "boolean",
+                "description": "Only rank people who applied to this job (default true).",
+            },
+        },
+        "required": ["job_id"],
+    },
+}
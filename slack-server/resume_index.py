@@ -0,0 +1,268 @@
+import io
+import math
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF resumes are skipped until pypdf is installed
+    PdfReader = None
+
+RESUME_INDEX_FILE = "resume_index.db"
+
+# A resume that still can't be read after this many runs stops holding back
+# the ingest cursor and is left out until someone fixes it
+MAX_RESUME_ATTEMPTS = 5
+
+# Keeps skills like c++, c# and node.js in one piece
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its my of on or our that the this to was "
+    "were will with you your me we he she they them their am been also using used use".split()
+)
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS and len(t) > 1]
+
+
+def extract_pdf(fileobj):
+    """Text of a PDF, one page at a time."""
+    if PdfReader is None:
+        raise RuntimeError("pypdf is not installed, can't read PDF resumes")
+    for page in PdfReader(fileobj).pages:
+        yield page.extract_text() or ""
+
+
+def extract_docx(fileobj):
+    """Text of a DOCX, one paragraph at a time, without loading the whole document."""
+    with zipfile.ZipFile(fileobj) as docx, docx.open("word/document.xml") as document:
+        parts = []
+        for _, elem in ElementTree.iterparse(document):
+            if elem.tag == WORD_NS + "t" and elem.text:
+                parts.append(elem.text)
+            elif elem.tag == WORD_NS + "p":
+                yield "".join(parts)
+                parts = []
+                elem.clear()
+
+
+def extract_text(fileobj, filename: str):
+    """Yield a resume's text in pieces, picking the parser from the file extension."""
+    name = filename.lower().split("?")[0]
+    if name.endswith(".pdf"):
+        return extract_pdf(fileobj)
+    if name.endswith(".docx"):
+        return extract_docx(fileobj)
+    if name.endswith(".txt"):
+        return io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace")
+    raise ValueError(f"Unsupported resume type: {filename}")
+
+
+class ResumeIndex:
+    """Inverted index of resume terms, stored in SQLite next to the bot.
+
+    Each applicant's resume is reduced to term counts once, at ingestion;
+    search() then ranks applicants by TF-IDF using only the postings for
+    the query's terms, so a lookup is a few indexed reads rather than a
+    download and parse per resume.
+    """
+
+    def __init__(self, path: str = RESUME_INDEX_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS applicants ("
+            "applicant_id TEXT PRIMARY KEY, job_id TEXT, name TEXT, email TEXT, resume_url TEXT, "
+            "applied_at TEXT, terms INTEGER)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT, applicant_id TEXT, tf INTEGER, PRIMARY KEY (term, applicant_id)) WITHOUT ROWID"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS postings_applicant ON postings (applicant_id)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS failures ("
+            "applicant_id TEXT PRIMARY KEY, applied_at TEXT, attempts INTEGER, error TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.commit()
+        self.indexed = {row[0] for row in self.db.execute("SELECT applicant_id FROM applicants")}
+
+    def has(self, applicant_id) -> bool:
+        return applicant_id in self.indexed
+
+    def size(self) -> int:
+        """Applicants in the index, including ones another process added."""
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM applicants").fetchone()[0]
+
+    def version(self) -> int:
+        """Goes up with every resume stored, including replaced ones and ones another process added."""
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def cursor(self):
+        """Where the next fetch of applicants should start.
+
+        The newest indexed applicant, unless an older one's resume couldn't
+        be read yet; then from that one, so it is asked for again.
+        """
+        with self.lock:
+            latest = self.db.execute("SELECT MAX(applied_at) FROM applicants").fetchone()[0]
+            failed = self.db.execute(
+                "SELECT MIN(applied_at) FROM failures WHERE attempts < ?", (MAX_RESUME_ATTEMPTS,)
+            ).fetchone()[0]
+        return min(filter(None, (latest, failed)), default=None)
+
+    def record_failure(self, applicant, error) -> int:
+        """Note that an applicant's resume couldn't be read; returns how many times that has happened."""
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO failures VALUES (?, ?, 1, ?) ON CONFLICT (applicant_id) "
+                "DO UPDATE SET attempts = attempts + 1, error = excluded.error",
+                (applicant["applicant_id"], applicant.get("applied_at"), str(error)),
+            )
+            self.db.commit()
+            return self.db.execute(
+                "SELECT attempts FROM failures WHERE applicant_id = ?", (applicant["applicant_id"],)
+            ).fetchone()[0]
+
+    def gave_up_on(self, applicant_id) -> bool:
+        with self.lock:
+            row = self.db.execute("SELECT attempts FROM failures WHERE applicant_id = ?", (applicant_id,)).fetchone()
+        return row is not None and row[0] >= MAX_RESUME_ATTEMPTS
+
+    def add(self, applicant, term_counts):
+        """Store (or replace) one applicant's row and term counts."""
+        applicant_id = applicant["applicant_id"]
+        with self.lock:
+            self.db.execute("DELETE FROM postings WHERE applicant_id = ?", (applicant_id,))
+            self.db.execute("DELETE FROM failures WHERE applicant_id = ?", (applicant_id,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO applicants VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (applicant_id, applicant.get("job_id"), applicant.get("name"), applicant.get("email"),
+                 applicant.get("resume_url"), applicant.get("applied_at"), sum(term_counts.values())),
+            )
+            self.db.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?)",
+                [(term, applicant_id, tf) for term, tf in term_counts.items()],
+            )
+            self.db.execute(
+                "INSERT INTO meta VALUES ('version', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1"
+            )
+            self.db.commit()
+            self.indexed.add(applicant_id)
+
+    def applicant(self, applicant_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM applicants WHERE applicant_id = ?", (applicant_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, job_id: str = None, limit: int = 10):
+        """Applicants whose resumes best match the query, best first.
+
+        Scores are sum((1 + log tf) * idf) over the query terms each resume
+        contains. Restrict to one posting with job_id.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        marks = ",".join("?" * len(terms))
+        job_filter = " AND a.job_id = ?" if job_id else ""
+        with self.lock:
+            total = self.db.execute("SELECT COUNT(*) FROM applicants").fetchone()[0]
+            df = dict(self.db.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", terms
+            ).fetchall())
+            rows = self.db.execute(
+                f"SELECT p.applicant_id, p.term, p.tf FROM postings p "
+                f"JOIN applicants a ON a.applicant_id = p.applicant_id "
+                f"WHERE p.term IN ({marks}){job_filter}",
+                terms + ([job_id] if job_id else []),
+            ).fetchall()
+
+        scores = {}
+        matched = {}
+        for applicant_id, term, tf in rows:
+            idf = math.log((1 + total) / (1 + df[term])) + 1
+            scores[applicant_id] = scores.get(applicant_id, 0.0) + (1 + math.log(tf)) * idf
+            matched.setdefault(applicant_id, []).append(term)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        results = []
+        for applicant_id in best:
+            applicant = self.applicant(applicant_id)
+            applicant.update(score=round(scores[applicant_id], 3), matched=sorted(matched[applicant_id]))
+            results.append(applicant)
+        return results
+
+    def top_terms(self, applicant_id, limit: int = 20):
+        """The terms that most set this resume apart from the others."""
+        with self.lock:
+            total = self.db.execute("SELECT COUNT(*) FROM applicants").fetchone()[0]
+            rows = self.db.execute(
+                "SELECT p.term, p.tf, (SELECT COUNT(*) FROM postings d WHERE d.term = p.term) "
+                "FROM postings p WHERE p.applicant_id = ?",
+                (applicant_id,),
+            ).fetchall()
+        weighted = [(term, (1 + math.log(tf)) * (math.log((1 + total) / (1 + df)) + 1)) for term, tf, df in rows]
+        weighted.sort(key=lambda tw: tw[1], reverse=True)
+        return [term for term, _ in weighted[:limit]]
+
+
+_shared_index = None
+
+
+def shared_index() -> ResumeIndex:
+    """The process-wide index at RESUME_INDEX_FILE, opened on first use."""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = ResumeIndex(os.getenv("RESUME_INDEX_FILE", RESUME_INDEX_FILE))
+    return _shared_index
+
+
+def search_applicants(query: str, job_id: str = None, limit: int = 5):
+    """Tool entry point for the bot: search the shared index."""
+    with metrics.timer("resume_search_seconds"):
+        results = shared_index().search(query, job_id, int(limit))
+    return {"applicants": [
+        {k: r[k] for k in ("applicant_id", "name", "email", "job_id", "score", "matched")} for r in results
+    ]}
+
+
+search_applicants_declaration = {
+    "name": "search_applicants",
+    "description": "Searches indexed applicant resumes for skills or keywords and returns the best matching candidates.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Skills or keywords to look for, e.g. 'react typescript'.",
+            },
+            "job_id": {
+                "type": "string",
+                "description": "Only return applicants to this job posting.",
+            },
+            "limit": {
+                "type": "integer",
+                "description": "How many applicants to return (default 5).",
+            },
+        },
+        "required": ["query"],
+    },
+}
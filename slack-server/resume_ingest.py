@@ -0,0 +1,167 @@
+"""Pull new applicants, extract their resumes and add them to the resume index.
+
+Reads the applicants table from Supabase and the resume files from their
+resume_url, or, with --source-dir, treats every resume in a local folder as
+an applicant (file name = applicant ID):
+
+    python resume_ingest.py                       # once, from Supabase
+    python resume_ingest.py --interval 60         # keep polling
+    python resume_ingest.py --source-dir resumes  # local files, no Supabase
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter
+from datetime import datetime, timezone
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+from resume_index import MAX_RESUME_ATTEMPTS, RESUME_INDEX_FILE, ResumeIndex, extract_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+RESUME_SUFFIXES = (".pdf", ".docx", ".txt")
+
+# Downloads bigger than this go to disk instead of memory while streaming
+SPOOL_MAX_BYTES = 2 * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+
+
+def fetch_applicants(since: str = None):
+    """Applicant rows from the Supabase REST API, oldest first, optionally only from `since` on."""
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL / SUPABASE_KEY not set")
+    query = "select=*&order=applied_at.asc"
+    if since:
+        # gte, not gt: rows sharing the last timestamp are caught and skipped by ID
+        query += "&applied_at=gte." + urllib.parse.quote(since)
+    req = urllib.request.Request(
+        f"{url}/rest/v1/applicants?{query}",
+        headers={"apikey": key, "Authorization": f"Bearer {key}"},
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.load(resp)
+
+
+def applicants_from_dir(root: str):
+    """One applicant row per resume file in root."""
+    rows = []
+    for name in sorted(os.listdir(root)):
+        if not name.lower().endswith(RESUME_SUFFIXES):
+            continue
+        mtime = os.path.getmtime(os.path.join(root, name))
+        rows.append({
+            "applicant_id": os.path.splitext(name)[0],
+            "name": os.path.splitext(name)[0],
+            "resume_url": name,
+            "applied_at": datetime.fromtimestamp(mtime, timezone.utc).isoformat(),
+        })
+    return rows
+
+
+class LocalResumeStore:
+    """Resumes in a local folder, looked up by the file name at the end of resume_url."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def open(self, resume_url: str):
+        name = os.path.basename(urllib.parse.urlparse(resume_url).path)
+        return open(os.path.join(self.root, name), "rb")
+
+
+class HttpResumeStore:
+    """Resumes behind public or signed URLs (Supabase storage).
+
+    Downloads are streamed in chunks into a spooled temp file, which stays
+    in memory for small resumes and moves to disk for big ones, since the
+    PDF parser needs a seekable file.
+    """
+
+    def open(self, resume_url: str):
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        with urllib.request.urlopen(resume_url, timeout=30) as resp:
+            shutil.copyfileobj(resp, spool, CHUNK_BYTES)
+        spool.seek(0)
+        return spool
+
+
+def term_counts(fileobj, filename: str) -> Counter:
+    """Count a resume's terms piece by piece, never holding the whole text."""
+    counts = Counter()
+    for piece in extract_text(fileobj, filename):
+        counts.update(tokenize(piece))
+    return counts
+
+
+def ingest(index: ResumeIndex, store, applicants):
+    """Index the applicants the index hasn't seen yet; returns how many were added.
+
+    A resume that can't be read is recorded as a failure in the index,
+    which keeps the fetch cursor from moving past it, so it is tried again
+    on the next run, up to MAX_RESUME_ATTEMPTS runs.
+    """
+    added = 0
+    for applicant in applicants:
+        if index.has(applicant["applicant_id"]) or index.gave_up_on(applicant["applicant_id"]):
+            continue
+        try:
+            with metrics.timer("resume_extract_seconds"), store.open(applicant["resume_url"]) as fileobj:
+                counts = term_counts(fileobj, applicant["resume_url"])
+        except Exception as e:
+            attempts = index.record_failure(applicant, e)
+            metrics.incr("resume_failures_total")
+            if attempts >= MAX_RESUME_ATTEMPTS:
+                logger.error("Giving up on the resume for %s after %d tries: %s",
+                             applicant['applicant_id'], attempts, e)
+            else:
+                logger.warning("Could not read resume for %s: %s", applicant['applicant_id'], e)
+            continue
+        index.add(applicant, counts)
+        metrics.incr("resumes_indexed_total")
+        added += 1
+    return added
+
+
+def run_once(index, store, source_dir=None):
+    started = time.perf_counter()
+    if source_dir:
+        applicants = applicants_from_dir(source_dir)
+    else:
+        applicants = fetch_applicants(index.cursor())
+    added = ingest(index, store, applicants)
+    logger.info("Indexed %d new resumes out of %d applicants in %.2fs",
+                added, len(applicants), time.perf_counter() - started)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=os.getenv("RESUME_INDEX_FILE", RESUME_INDEX_FILE))
+    parser.add_argument("--source-dir", help="read resumes from this folder instead of Supabase")
+    parser.add_argument("--interval", type=float, default=0, help="seconds between polls; 0 runs once")
+    args = parser.parse_args()
+
+    metrics.setup_logging()
+    index = ResumeIndex(args.index)
+    store = LocalResumeStore(args.source_dir) if args.source_dir else HttpResumeStore()
+    while True:
+        try:
+            run_once(index, store, args.source_dir)
+        except Exception as e:
+            logger.error("An error occurred: %s", e)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
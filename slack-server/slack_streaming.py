@@ -0,0 +1,179 @@
+import copy
+import os
+import threading
+import time
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+# Seconds between edits of any one streamed message
+STREAM_UPDATE_INTERVAL = float(os.getenv("SLACK_STREAM_UPDATE_INTERVAL", "1.0"))
+
+# chat.update is a Tier 3 method: about 50 calls a minute for the whole
+# workspace, however many replies are streaming at once
+STREAM_UPDATES_PER_MINUTE = float(os.getenv("SLACK_STREAM_UPDATES_PER_MINUTE", "40"))
+
+PLACEHOLDER_TEXT = "Thinking..."
+
+# Set STREAM_RESPONSES=1 to edit replies in place as Gemini generates them
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "0") == "1"
+
+
+class UpdateBudget:
+    """chat.update calls per minute shared by every reply streaming in the process.
+
+    Edits along the way only go out while there's budget left; the final
+    edit always does, and what it spends is paid back before the next
+    optional one.
+    """
+
+    def __init__(self, per_minute: float, burst: float = 5):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def take(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+
+    def drain(self):
+        """Slack said ratelimited: nothing optional until the budget refills."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0)
+
+
+update_budget = UpdateBudget(STREAM_UPDATES_PER_MINUTE)
+
+
+class StreamedReply:
+    """Collects streamed text and decides when it's time for another chat.update."""
+
+    def __init__(self, interval: float = STREAM_UPDATE_INTERVAL, budget: UpdateBudget = None):
+        self.interval = interval
+        self.budget = budget or update_budget
+        self.parts = []
+        self.last_update = 0.0
+        self.last_sent = ""
+        self.first_token = None
+        # Tool calls the model asked for along the way, for the caller to run
+        self.function_calls = []
+        self.started = time.perf_counter()
+        self.last_chunk = None
+
+    def add(self, chunk) -> bool:
+        """Append a chunk; True if the message should be edited now."""
+        # Function-call chunks carry no text
+        self.last_chunk = chunk
+        if chunk.function_calls:
+            self.function_calls.extend(chunk.function_calls)
+        if chunk.text:
+            if self.first_token is None:
+                self.first_token = time.perf_counter()
+                metrics.observe("llm_first_token_seconds", self.first_token - self.started)
+            self.parts.append(chunk.text)
+        now = time.perf_counter()
+        if self.text != self.last_sent and now - self.last_update >= self.interval and self.budget.try_take():
+            self.last_update = now
+            self.last_sent = self.text
+            return True
+        return False
+
+    def needs_final_update(self) -> bool:
+        if self.text and self.text != self.last_sent:
+            self.budget.take()
+            return True
+        return False
+
+    def rate_limited(self, error: SlackApiError):
+        """An edit along the way got a 429: stop editing until the final text."""
+        if error.response.get("error") != "ratelimited":
+            raise error
+        metrics.incr("slack_rate_limited_total")
+        self.budget.drain()
+        self.interval = float("inf")
+        self.last_sent = None
+
+    def finish(self):
+        """Record how long the stream took and what it cost."""
+        metrics.observe("llm_stream_seconds", time.perf_counter() - self.started)
+        # Usage metadata comes with the last chunk
+        metrics.count_tokens(self.last_chunk)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def without_rate_limit_retries(client):
+    """A copy of client that raises on a 429 instead of sleeping out Retry-After.
+
+    Edits along the way are optional, so the first 429 should stop them
+    rather than hold up the stream; the final edit keeps the retries.
+    """
+    handlers = getattr(client, "retry_handlers", None)
+    if not handlers:
+        return client
+    quick = copy.copy(client)
+    quick.retry_handlers = [handler for handler in handlers
+                            if not isinstance(handler, (RateLimitErrorRetryHandler, AsyncRateLimitErrorRetryHandler))]
+    return quick
+
+
+def stream_to_slack(client, channel, ts, chunks):
+    """Edit the message at ts as chunks arrive; returns the StreamedReply."""
+    reply = StreamedReply()
+    quick = without_rate_limit_retries(client)
+    for chunk in chunks:
+        if reply.add(chunk):
+            try:
+                quick.chat_update(channel=channel, ts=ts, text=reply.text)
+            except SlackApiError as error:
+                reply.rate_limited(error)
+                continue
+            metrics.incr("slack_updates_total")
+    # The client's RateLimitErrorRetryHandler waits out a 429 on this one
+    if reply.needs_final_update():
+        client.chat_update(channel=channel, ts=ts, text=reply.text)
+        metrics.incr("slack_updates_total")
+    reply.finish()
+    return reply
+
+
+async def stream_to_slack_async(client, channel, ts, chunks):
+    """Async version of stream_to_slack for AsyncApp handlers."""
+    reply = StreamedReply()
+    quick = without_rate_limit_retries(client)
+    async for chunk in chunks:
+        if reply.add(chunk):
+            try:
+                await quick.chat_update(channel=channel, ts=ts, text=reply.text)
+            except SlackApiError as error:
+                reply.rate_limited(error)
+                continue
+            metrics.incr("slack_updates_total")
+    if reply.needs_final_update():
+        await client.chat_update(channel=channel, ts=ts, text=reply.text)
+        metrics.incr("slack_updates_total")
+    reply.finish()
+    return reply
@@ -0,0 +1,137 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import time
+
+from google.genai import types
+
+import common_path  # noqa: F401  (puts common/ on sys.path)
+import metrics
+
+logger = logging.getLogger(__name__)
+
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+# How long one model turn's tool calls may take, all together
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+# Model turns that may call tools before we insist on a plain answer
+TOOL_MAX_ITERATIONS = int(os.getenv("TOOL_MAX_ITERATIONS", "5"))
+
+
+def without_tools(config: types.GenerateContentConfig) -> types.GenerateContentConfig:
+    """Same config, but the model may not call functions."""
+    return config.model_copy(update={"tool_config": types.ToolConfig(
+        function_calling_config=types.FunctionCallingConfig(mode="NONE"),
+    )})
+
+
+class ToolDispatcher:
+    """Runs the function calls Gemini asks for and feeds the results back.
+
+    functions maps declaration names to the Python callables that implement
+    them. All calls from one model turn are independent, so they run
+    together on a thread pool; emailing five candidates takes about as long
+    as emailing one. A turn's calls get timeout seconds in total. Anything
+    still running after that is reported to the model as timed out (it
+    keeps running in the background, since threads can't be cancelled).
+    After max_iterations tool turns the model is asked for a final answer
+    with tools switched off.
+    """
+
+    def __init__(self, functions, max_workers: int = TOOL_WORKERS, timeout: float = TOOL_TIMEOUT_SECONDS,
+                 max_iterations: int = TOOL_MAX_ITERATIONS):
+        self.functions = functions
+        self.timeout = timeout
+        self.max_iterations = max_iterations
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def _call(self, call: types.FunctionCall):
+        func = self.functions.get(call.name)
+        if func is None:
+            return {"error": f"Unknown function {call.name}"}
+        try:
+            with metrics.timer("tool_call_seconds", tool=call.name):
+                result = func(**(call.args or {}))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        # A function response has to be an object
+        return result if isinstance(result, dict) else {"result": result}
+
+    def _response_parts(self, calls, futures, done):
+        parts = []
+        for call, future in zip(calls, futures):
+            if future in done:
+                result = future.result()
+            else:
+                result = {"error": f"Timed out after {self.timeout:g}s; it may still complete, do not retry."}
+            parts.append(types.Part(function_response=types.FunctionResponse(
+                id=call.id, name=call.name, response=result,
+            )))
+        return parts
+
+    def execute(self, calls):
+        """Run one turn's calls concurrently; returns function_response parts in call order."""
+        started = time.perf_counter()
+        futures = [self.pool.submit(self._call, call) for call in calls]
+        done, _ = concurrent.futures.wait(futures, timeout=self.timeout)
+        logger.info("Ran %d tool call(s) in %.2fs", len(calls), time.perf_counter() - started)
+        return self._response_parts(calls, futures, done)
+
+    async def execute_async(self, calls):
+        """execute() for the async bot; the calls still run on the thread pool."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        wrapped = [asyncio.wrap_future(self.pool.submit(self._call, call), loop=loop) for call in calls]
+        done, _ = await asyncio.wait(wrapped, timeout=self.timeout)
+        logger.info("Ran %d tool call(s) in %.2fs", len(calls), time.perf_counter() - started)
+        return self._response_parts(calls, wrapped, done)
+
+    @staticmethod
+    def _model_turn(response, calls):
+        # Prefer the model's own content so thought signatures are kept
+        if response is not None and response.candidates and response.candidates[0].content:
+            return response.candidates[0].content
+        return types.Content(role="model", parts=[types.Part(function_call=call) for call in calls])
+
+    def run(self, client, model, contents, config, calls=None, response=None):
+        """Generate until the model stops calling tools and return the final response.
+
+        Pass calls (and the response they came from, if there is one) to
+        pick up a turn that already asked for tools, e.g. from a stream.
+        """
+        contents = list(contents)
+        for _ in range(self.max_iterations):
+            if calls is None:
+                with metrics.timer("llm_generate_seconds"):
+                    response = client.models.generate_content(model=model, contents=contents, config=config)
+                metrics.count_tokens(response)
+                calls = response.function_calls
+                if not calls:
+                    return response
+            contents.append(self._model_turn(response, calls))
+            contents.append(types.Content(role="user", parts=self.execute(calls)))
+            calls = response = None
+        with metrics.timer("llm_generate_seconds"):
+            response = client.models.generate_content(model=model, contents=contents, config=without_tools(config))
+        metrics.count_tokens(response)
+        return response
+
+    async def run_async(self, client, model, contents, config, calls=None, response=None):
+        """run() with the async genai client (client.aio)."""
+        contents = list(contents)
+        for _ in range(self.max_iterations):
+            if calls is None:
+                with metrics.timer("llm_generate_seconds"):
+                    response = await client.aio.models.generate_content(model=model, contents=contents, config=config)
+                metrics.count_tokens(response)
+                calls = response.function_calls
+                if not calls:
+                    return response
+            contents.append(self._model_turn(response, calls))
+            contents.append(types.Content(role="user", parts=await self.execute_async(calls)))
+            calls = response = None
+        with metrics.timer("llm_generate_seconds"):
+            response = await client.aio.models.generate_content(model=model, contents=contents,
+                                                                config=without_tools(config))
+        metrics.count_tokens(response)
+        return response